@@ -11,21 +11,76 @@ from tensorflow.keras import layers
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+import dataset_store
+import os
 warnings.filterwarnings('ignore')
 
+# Raw value columns each forecast model reads from the dataset
+GENERATION_COLUMNS = ['generation', 'temperature', 'wind_speed', 'solar_irradiance', 'humidity']
+DEMAND_COLUMNS = ['demand']
+PRICE_COLUMNS = ['price']
+
+# Frame columns each pooled training task reads
+GENERATION_TRAINING_COLUMNS = ['generation', 'hour', 'month', 'weekday', 'temperature', 'wind_speed',
+                               'solar_irradiance', 'humidity', 'region_encoded']
+DEMAND_TRAINING_COLUMNS = ['timestamp', 'region', 'demand']
+
+# LSTM price model: hours of history in, hours forecast per forward pass out
+PRICE_SEQ_LENGTH = 24
+PRICE_HORIZON = 24
+
+# Hours of future Prophet demand forecasts kept per region for lookup
+DEMAND_CACHE_HOURS = 7 * 24
+
+# Prophet settings shared by the sequential and pooled per-region fits
+PROPHET_PARAMS = dict(
+    yearly_seasonality=True,
+    weekly_seasonality=True,
+    daily_seasonality=True,
+    seasonality_mode='multiplicative'
+)
+
 class RenewableEnergyAIModel:
-    def __init__(self, data_path='renewable_5yr_hourly.csv'):
+    def __init__(self, data_path='renewable_5yr_hourly.csv', columns=None, inference_only=False):
+        """Set `inference_only` to skip loading the training dataset; it is then
+        loaded lazily the first time training touches `self.df`."""
         self.data_path = data_path
+        self.columns = columns
         self.models = {}
         self.scalers = {}
         self.encoders = {}
-        self.load_and_preprocess_data()
-
-    def load_and_preprocess_data(self):
-        """Load and preprocess the dataset"""
+        self._df = None
+        # {'index': hourly DatetimeIndex, 'values': {region: forecast array}, 'rolling': bool},
+        # see precompute_demand_forecasts()
+        self._demand_cache = None
+        if not inference_only:
+            self.load_and_preprocess_data(columns)
+
+    @property
+    def df(self):
+        """Training dataset, loaded on first access"""
+        if self._df is None:
+            self.load_and_preprocess_data(self.columns)
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+
+    def load_and_preprocess_data(self, columns=None):
+        """Load and preprocess the dataset.
+
+        `columns` restricts loading to the named value columns (timestamp and
+        region are always read), e.g. GENERATION_COLUMNS to skip price/SoC.
+        Reads from the columnar store when one exists next to the CSV.
+        """
         print("Loading dataset...")
-        self.df = pd.read_csv(self.data_path)
-        self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
+        source = dataset_store.resolve_data_path(self.data_path)
+        if dataset_store.is_store(source):
+            self.df = dataset_store.load_dataset(source, columns=columns)
+        else:
+            usecols = None if columns is None else ['timestamp', 'region'] + list(columns)
+            self.df = pd.read_csv(source, usecols=usecols, parse_dates=['timestamp'])
 
         # Create additional time features
         self.df['hour'] = self.df['timestamp'].dt.hour
@@ -41,13 +96,18 @@ class RenewableEnergyAIModel:
         print(f"Date range: {self.df['timestamp'].min()} to {self.df['timestamp'].max()}")
         print(f"Regions: {self.df['region'].unique()}")
 
-    def create_sequences(self, data, seq_length=24):
-        """Create sequences for LSTM input"""
-        X, y = [], []
-        for i in range(len(data) - seq_length):
-            X.append(data[i:i+seq_length])
-            y.append(data[i+seq_length])
-        return np.array(X), np.array(y)
+    def create_sequences(self, data, seq_length=PRICE_SEQ_LENGTH, horizon=1):
+        """Create LSTM inputs (n, seq_length, 1) and the following `horizon` values (n, horizon)"""
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        values = np.asarray(data).reshape(-1)
+        n = len(values) - seq_length - horizon + 1
+        if n <= 0:
+            return np.empty((0, seq_length, 1)), np.empty((0, horizon))
+        # Strided windows instead of a Python loop over every position
+        X = sliding_window_view(values, seq_length)[:n, :, None]
+        y = sliding_window_view(values[seq_length:], horizon)[:n]
+        return X.copy(), y.copy()
 
     def train_generation_forecast_model(self):
         """Train XGBoost model for renewable generation forecasting"""
@@ -89,53 +149,49 @@ class RenewableEnergyAIModel:
 
         return mape, rmse
 
-    def train_demand_forecast_model(self):
-        """Train Prophet model for demand forecasting"""
+    def train_demand_forecast_model(self, n_jobs=1):
+        """Train Prophet model for demand forecasting.
+
+        Regions are independent fits; with `n_jobs` > 1 (None = one per CPU)
+        they run concurrently in a process pool.
+        """
         print("\nTraining Demand Forecast Model (Prophet)...")
 
         # Prepare data for Prophet (needs 'ds' and 'y' columns)
-        demand_data = self.df[['timestamp', 'demand', 'region']].dropna()
+        demand_data = self.df[DEMAND_TRAINING_COLUMNS].dropna()
+        region_frames = [(region, demand_data[demand_data['region'] == region])
+                         for region in demand_data['region'].unique()]
 
         # Group by region and train separate models
-        self.models['demand'] = {}
+        if n_jobs is None or n_jobs > 1:
+            with _process_pool(n_jobs, len(region_frames)) as pool:
+                fits = list(pool.map(_fit_demand_region, *zip(*region_frames)))
+        else:
+            fits = [_fit_demand_region(region, region_data) for region, region_data in region_frames]
 
-        total_mape = 0
-        region_count = 0
-
-        for region in demand_data['region'].unique():
-            region_data = demand_data[demand_data['region'] == region].copy()
-            region_data = region_data.rename(columns={'timestamp': 'ds', 'demand': 'y'})
-            region_data = region_data[['ds', 'y']]
-
-            # Split data
-            train_size = int(len(region_data) * 0.8)
-            train_data = region_data[:train_size]
-
-            # Train Prophet model
-            model = Prophet(
-                yearly_seasonality=True,
-                weekly_seasonality=True,
-                daily_seasonality=True,
-                seasonality_mode='multiplicative'
-            )
-            model.fit(train_data)
+        return self._merge_demand_fits(fits)
 
+    def _merge_demand_fits(self, fits):
+        """Collect (region, model, mape) fits into models['demand']; returns the average MAPE"""
+        self.models['demand'] = {}
+        self._demand_cache = None
+        total_mape = 0
+        for region, model, mape in fits:
             self.models['demand'][region] = model
-
-            # Evaluate
-            test_data = region_data[train_size:]
-            forecast = model.predict(test_data[['ds']])
-            mape = mean_absolute_percentage_error(test_data['y'], forecast['yhat'])
             total_mape += mape
-            region_count += 1
 
-        avg_mape = total_mape / region_count
+        avg_mape = total_mape / len(fits)
         print(".2f")
 
         return avg_mape
 
-    def train_price_forecast_model(self):
-        """Train LSTM model for price forecasting"""
+    def train_price_forecast_model(self, horizon=PRICE_HORIZON):
+        """Train LSTM model for price forecasting.
+
+        The output layer predicts the next `horizon` hours at once, so
+        forecast_price() needs one forward pass per horizon instead of one per
+        hour; `horizon=1` trains the original single-step model.
+        """
         print("\nTraining Price Forecast Model (LSTM)...")
 
         # Prepare data
@@ -147,8 +203,8 @@ class RenewableEnergyAIModel:
         price_scaled = self.scalers['price'].fit_transform(price_values)
 
         # Create sequences
-        seq_length = 24  # 24 hours
-        X, y = self.create_sequences(price_scaled, seq_length)
+        seq_length = PRICE_SEQ_LENGTH
+        X, y = self.create_sequences(price_scaled, seq_length, horizon)
 
         # Split data
         train_size = int(len(X) * 0.8)
@@ -161,7 +217,7 @@ class RenewableEnergyAIModel:
             layers.Dropout(0.2),
             layers.LSTM(50, activation='relu'),
             layers.Dropout(0.2),
-            layers.Dense(1)
+            layers.Dense(horizon)
         ])
 
         model.compile(optimizer='adam', loss='mse')
@@ -178,8 +234,9 @@ class RenewableEnergyAIModel:
 
         # Evaluate
         y_pred_scaled = model.predict(X_test)
-        y_pred = self.scalers['price'].inverse_transform(y_pred_scaled)
-        y_test_actual = self.scalers['price'].inverse_transform(y_test)
+        # Scaler is fit on one column; evaluate over every forecast step
+        y_pred = self.scalers['price'].inverse_transform(y_pred_scaled.reshape(-1, 1))
+        y_test_actual = self.scalers['price'].inverse_transform(y_test.reshape(-1, 1))
 
         mape = mean_absolute_percentage_error(y_test_actual, y_pred)
         rmse = np.sqrt(mean_squared_error(y_test_actual, y_pred))
@@ -189,20 +246,43 @@ class RenewableEnergyAIModel:
 
         return mape, rmse, history
 
-    def train_all_models(self):
-        """Train all forecasting models"""
+    def train_all_models(self, n_jobs=1):
+        """Train all forecasting models.
+
+        With `n_jobs` > 1 (None = one per CPU) the XGBoost model and every
+        per-region Prophet fit run in a process pool, while the LSTM trains in
+        this process at the same time; TensorFlow keeps its own thread pool
+        and is not moved into workers.
+        """
         print("Starting AI Model Training Pipeline...")
 
         results = {}
 
-        # Train generation forecast
-        results['generation'] = self.train_generation_forecast_model()
+        if n_jobs is None or n_jobs > 1:
+            demand_data = self.df[DEMAND_TRAINING_COLUMNS].dropna()
+            regions = demand_data['region'].unique()
 
-        # Train demand forecast
-        results['demand'] = self.train_demand_forecast_model()
+            with _process_pool(n_jobs, len(regions) + 1) as pool:
+                generation_future = pool.submit(_train_generation, self.df[GENERATION_TRAINING_COLUMNS])
+                demand_futures = [pool.submit(_fit_demand_region, region, demand_data[demand_data['region'] == region])
+                                  for region in regions]
 
-        # Train price forecast
-        results['price'] = self.train_price_forecast_model()
+                # Train price forecast here while the pool works
+                results['price'] = self.train_price_forecast_model()
+
+                results['generation'], models, scalers = generation_future.result()
+                self.models.update(models)
+                self.scalers.update(scalers)
+                results['demand'] = self._merge_demand_fits([future.result() for future in demand_futures])
+        else:
+            # Train generation forecast
+            results['generation'] = self.train_generation_forecast_model()
+
+            # Train demand forecast
+            results['demand'] = self.train_demand_forecast_model()
+
+            # Train price forecast
+            results['price'] = self.train_price_forecast_model()
 
         print("\n" + "="*50)
         print("MODEL TRAINING COMPLETE")
@@ -230,57 +310,138 @@ class RenewableEnergyAIModel:
         return predictions
 
     def forecast_demand(self, timestamps, regions):
-        """Generate demand forecasts using Prophet"""
+        """Generate demand forecasts using Prophet.
+
+        Rows are grouped by region. Timestamps inside the precomputed window
+        are array lookups, and the rest get one Prophet predict() call per
+        region over their distinct timestamps. Unknown regions are NaN.
+        """
         if 'demand' not in self.models:
             raise ValueError("Demand model not trained")
 
-        predictions = []
+        timestamps = pd.DatetimeIndex(pd.to_datetime(np.asarray(timestamps)))
+        codes, region_names = pd.factorize(np.asarray(regions, dtype=object))
+        predictions = np.full(len(timestamps), np.nan)
+
+        if self._demand_cache is not None:
+            self.roll_demand_cache()
+        cache = self._demand_cache
+
+        for code, region in enumerate(region_names):
+            if region not in self.models['demand']:
+                continue
+            rows = np.flatnonzero(codes == code)
+            region_timestamps = timestamps[rows]
+            values = np.full(len(rows), np.nan)
+
+            hit = np.zeros(len(rows), dtype=bool)
+            if cache is not None and region in cache['values']:
+                positions = cache['index'].get_indexer(region_timestamps)
+                hit = positions >= 0
+                values[hit] = cache['values'][region][positions[hit]]
+
+            if not hit.all():
+                unique, inverse = np.unique(region_timestamps[~hit].values, return_inverse=True)
+                values[~hit] = self._predict_demand_region(region, unique)[inverse]
+            predictions[rows] = values
+
+        return predictions
+
+    def _predict_demand_region(self, region, timestamps):
+        """One Prophet predict() over sorted, distinct timestamps; yhat array in the same order"""
+        forecast = self.models['demand'][region].predict(pd.DataFrame({'ds': timestamps}))
+        return forecast['yhat'].values
+
+    def precompute_demand_forecasts(self, start=None, hours=DEMAND_CACHE_HOURS):
+        """Cache every region's hourly demand forecast for `hours` from `start`.
 
-        for ts, region in zip(timestamps, regions):
-            if region in self.models['demand']:
-                future = pd.DataFrame({'ds': [ts]})
-                forecast = self.models['demand'][region].predict(future)
-                predictions.append(forecast['yhat'].values[0])
-            else:
-                predictions.append(np.nan)
+        Without `start` the window begins at the current hour and rolls
+        forward with the clock; an explicit `start` pins it.
+        """
+        if 'demand' not in self.models:
+            raise ValueError("Demand model not trained")
 
-        return np.array(predictions)
+        rolling = start is None
+        start = pd.Timestamp.now().floor('h') if rolling else pd.Timestamp(start).floor('h')
+        index = pd.date_range(start, periods=hours, freq='h')
+        values = {region: self._predict_demand_region(region, index.values) for region in self.models['demand']}
+        self._demand_cache = {'index': index, 'values': values, 'rolling': rolling}
+        print(f"Cached {hours} hours of demand forecasts for {len(values)} regions from {start}")
+
+    def roll_demand_cache(self, now=None):
+        """Advance a rolling cache window to start at the current hour, forecasting only the newly uncovered hours"""
+        cache = self._demand_cache
+        if cache is None or not cache['rolling']:
+            return
+        index = cache['index']
+        start = pd.Timestamp(now).floor('h') if now is not None else pd.Timestamp.now().floor('h')
+        shift = int((start - index[0]) / pd.Timedelta(hours=1))
+        if shift <= 0:
+            return
+        if shift >= len(index):
+            self.precompute_demand_forecasts(start, len(index))
+            self._demand_cache['rolling'] = True
+            return
+
+        new_index = pd.date_range(start, periods=len(index), freq='h')
+        tail = new_index[len(index) - shift:]
+        values = {region: np.concatenate([forecast[shift:], self._predict_demand_region(region, tail.values)])
+                  for region, forecast in cache['values'].items()}
+        # Swap in a complete new cache so concurrent readers never see a half-rolled window
+        self._demand_cache = {'index': new_index, 'values': values, 'rolling': True}
 
     def forecast_price(self, historical_prices, steps=24):
-        """Generate price forecasts using LSTM"""
+        """Generate price forecasts using LSTM.
+
+        `historical_prices` is one series (history,) or a batch of series
+        (..., history), e.g. regions x scenarios; the result has shape
+        (steps,) or (..., steps). All series go through the network together,
+        one forward pass per model horizon (one per step for single-step
+        models).
+        """
         if 'price' not in self.models:
             raise ValueError("Price model not trained")
 
-        # Scale historical data
-        prices_scaled = self.scalers['price'].transform(historical_prices.reshape(-1, 1))
-
-        # Create sequence for prediction
-        seq_length = 24
-        if len(prices_scaled) < seq_length:
-            # Pad with last value if needed
-            pad_length = seq_length - len(prices_scaled)
-            pad_values = np.repeat(prices_scaled[0], pad_length).reshape(-1, 1)
-            prices_scaled = np.vstack([pad_values, prices_scaled])
-
-        input_seq = prices_scaled[-seq_length:].reshape(1, seq_length, 1)
+        historical_prices = np.asarray(historical_prices, dtype=float)
+        batch_shape = historical_prices.shape[:-1]
+        series = historical_prices.reshape(-1, historical_prices.shape[-1])
 
-        # Predict next steps
+        # Scale historical data
+        scaler = self.scalers['price']
+        prices_scaled = scaler.transform(series.reshape(-1, 1)).reshape(series.shape)
+
+        # Pad short histories with their first value
+        seq_length = PRICE_SEQ_LENGTH
+        if prices_scaled.shape[1] < seq_length:
+            pad = np.repeat(prices_scaled[:, :1], seq_length - prices_scaled.shape[1], axis=1)
+            prices_scaled = np.hstack([pad, prices_scaled])
+        window = prices_scaled[:, -seq_length:]
+
+        # Each pass predicts `horizon` steps for every series; longer forecasts feed them back in
+        horizon = self.models['price'].output_shape[-1]
         predictions = []
-        current_seq = input_seq.copy()
+        produced = 0
+        while produced < steps:
+            step = self._predict_price_scaled(window[:, :, None])
+            predictions.append(step)
+            produced += horizon
+            window = np.hstack([window, step])[:, -seq_length:]
 
-        for _ in range(steps):
-            pred = self.models['price'].predict(current_seq, verbose=0)
-            predictions.append(pred[0, 0])
+        # Inverse transform
+        predictions = np.hstack(predictions)[:, :steps]
+        predictions_actual = scaler.inverse_transform(predictions.reshape(-1, 1)).reshape(predictions.shape)
 
-            # Update sequence
-            current_seq = np.roll(current_seq, -1, axis=1)
-            current_seq[0, -1, 0] = pred[0, 0]
+        return predictions_actual.reshape(batch_shape + (steps,))
 
-        # Inverse transform
-        predictions = np.array(predictions).reshape(-1, 1)
-        predictions_actual = self.scalers['price'].inverse_transform(predictions)
+    def _predict_price_scaled(self, x):
+        """LSTM forward pass on a (batch, seq_length, 1) array.
 
-        return predictions_actual.flatten()
+        Calls the model directly rather than through model.predict(), which
+        builds a dataset and step function on every call, a large fixed cost
+        for a handful of sequences.
+        """
+        x = tf.convert_to_tensor(x, dtype=tf.float32)
+        return self.models['price'](x, training=False).numpy()
 
     def save_models(self, path='models/'):
         """Save trained models"""
@@ -353,6 +514,42 @@ class RenewableEnergyAIModel:
 
         print(f"Plots saved to {save_path}")
 
+def _process_pool(n_jobs, n_tasks):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    n_workers = min(n_jobs or os.cpu_count() or 1, n_tasks)
+    print(f"Training on {n_workers} processes")
+    # spawn, not fork: XGBoost's OpenMP runtime and TensorFlow are not fork-safe
+    return ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'))
+
+def _train_generation(df):
+    """Pool worker: fit the XGBoost generation model; returns (score, models, scalers)"""
+    model = RenewableEnergyAIModel(inference_only=True)
+    model.df = df
+    score = model.train_generation_forecast_model()
+    return score, model.models, model.scalers
+
+def _fit_demand_region(region, region_data):
+    """Fit and evaluate one region's Prophet demand model; returns (region, model, mape)"""
+    region_data = region_data.rename(columns={'timestamp': 'ds', 'demand': 'y'})
+    region_data = region_data[['ds', 'y']]
+
+    # Split data
+    train_size = int(len(region_data) * 0.8)
+    train_data = region_data[:train_size]
+
+    # Train Prophet model
+    model = Prophet(**PROPHET_PARAMS)
+    model.fit(train_data)
+
+    # Evaluate
+    test_data = region_data[train_size:]
+    forecast = model.predict(test_data[['ds']])
+    mape = mean_absolute_percentage_error(test_data['y'], forecast['yhat'])
+
+    return region, model, mape
+
 if __name__ == "__main__":
     # Install required packages if not available
     try:
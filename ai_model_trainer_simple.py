@@ -8,22 +8,63 @@ import xgboost as xgb
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+import dataset_store
+from forecast_features import GENERATION_FEATURES, baseline_demand, baseline_price
+from profile_model import HourlyProfileModel
+from tree_compiler import COMPILED_MAX_ROWS
 import os
 warnings.filterwarnings('ignore')
 
+# Raw value columns each forecast model reads from the dataset
+GENERATION_COLUMNS = ['generation', 'temperature', 'wind_speed', 'solar_irradiance', 'humidity']
+DEMAND_COLUMNS = ['demand']
+PRICE_COLUMNS = ['price']
+
+# Frame columns each training method reads; parallel training ships only these to workers
+TRAINING_COLUMNS = {
+    'generation': ['generation'] + GENERATION_FEATURES,
+    'demand': ['timestamp', 'region', 'demand'],
+    'price': ['timestamp', 'region', 'price', 'hour']
+}
+
 class RenewableEnergyAIModel:
-    def __init__(self, data_path='renewable_5yr_hourly.csv'):
+    def __init__(self, data_path='renewable_5yr_hourly.csv', columns=None, inference_only=False):
+        """Set `inference_only` to skip loading the training dataset; it is then
+        loaded lazily the first time training touches `self.df`."""
         self.data_path = data_path
+        self.columns = columns
         self.models = {}
         self.scalers = {}
         self.encoders = {}
-        self.load_and_preprocess_data()
-
-    def load_and_preprocess_data(self):
-        """Load and preprocess the dataset"""
+        self._df = None
+        if not inference_only:
+            self.load_and_preprocess_data(columns)
+
+    @property
+    def df(self):
+        """Training dataset, loaded on first access"""
+        if self._df is None:
+            self.load_and_preprocess_data(self.columns)
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+
+    def load_and_preprocess_data(self, columns=None):
+        """Load and preprocess the dataset.
+
+        `columns` restricts loading to the named value columns (timestamp and
+        region are always read), e.g. GENERATION_COLUMNS to skip price/SoC.
+        Reads from the columnar store when one exists next to the CSV.
+        """
         print("Loading dataset...")
-        self.df = pd.read_csv(self.data_path)
-        self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
+        source = dataset_store.resolve_data_path(self.data_path)
+        if dataset_store.is_store(source):
+            self.df = dataset_store.load_dataset(source, columns=columns)
+        else:
+            usecols = None if columns is None else ['timestamp', 'region'] + list(columns)
+            self.df = pd.read_csv(source, usecols=usecols, parse_dates=['timestamp'])
 
         # Create additional time features
         self.df['hour'] = self.df['timestamp'].dt.hour
@@ -44,8 +85,7 @@ class RenewableEnergyAIModel:
         print("\nTraining Generation Forecast Model (XGBoost)...")
 
         # Features for generation forecasting
-        features = ['hour', 'month', 'weekday', 'temperature', 'wind_speed',
-                   'solar_irradiance', 'humidity', 'region_encoded']
+        features = GENERATION_FEATURES
 
         # Prepare data
         gen_data = self.df.dropna(subset=['generation'] + features).copy()
@@ -68,6 +108,7 @@ class RenewableEnergyAIModel:
             random_state=42
         )
         self.models['generation'].fit(X_train_scaled, y_train)
+        self.models.pop('generation_compiled', None)
 
         # Evaluate
         y_pred = self.models['generation'].predict(X_test_scaled)
@@ -79,24 +120,75 @@ class RenewableEnergyAIModel:
 
         return mape, rmse
 
+    def train_generation_forecast_model_external(self, holdout_start=None, holdout_fraction=0.2,
+                                                 batch_rows=1 << 20, max_bin=256, cache_dir=None):
+        """Train the generation model by streaming the columnar store, with bounded memory.
+
+        A first pass fits the scaler with partial_fit; XGBoost then builds a
+        quantized QuantileDMatrix from a batch iterator (or, with `cache_dir`,
+        an external-memory DMatrix paged to disk), so the raw frame is never
+        materialized. Rows from `holdout_start` on (default: the last
+        `holdout_fraction` of the time range) are held out for evaluation.
+        """
+        from external_training import (BOOSTER_PARAMS, NUM_BOOST_ROUND, StoreDataIter, evaluate, fit_scaler,
+                                       time_filter)
+
+        print("\nTraining Generation Forecast Model (XGBoost, external memory)...")
+
+        store_path = dataset_store.resolve_data_path(self.data_path)
+        if not dataset_store.is_store(store_path):
+            store_path = dataset_store.convert_csv_to_store(store_path)
+
+        self.encoders['region'] = LabelEncoder().fit(dataset_store.store_regions(store_path))
+        if holdout_start is None:
+            start, end = dataset_store.time_range(store_path)
+            holdout_start = start + (end - start) * (1 - holdout_fraction)
+        train_filter = time_filter(end=holdout_start)
+        test_filter = time_filter(start=holdout_start)
+        print(f"Training on rows before {holdout_start}, evaluating on the rest")
+
+        # Pass 1: scaler statistics
+        self.scalers['generation'] = StandardScaler()
+        n_train = fit_scaler(store_path, self.encoders['region'], self.scalers['generation'], train_filter, batch_rows)
+        if n_train == 0:
+            raise ValueError(f"No training rows before {holdout_start}")
+
+        # Pass 2: quantized training matrix built batch by batch
+        cache_prefix = os.path.join(cache_dir, 'generation') if cache_dir else None
+        batches = StoreDataIter(store_path, self.encoders['region'], self.scalers['generation'],
+                                train_filter, batch_rows, cache_prefix)
+        if cache_dir:
+            dtrain = xgb.DMatrix(batches)
+        else:
+            dtrain = xgb.QuantileDMatrix(batches, max_bin=max_bin)
+
+        booster = xgb.train({**BOOSTER_PARAMS, 'max_bin': max_bin}, dtrain, NUM_BOOST_ROUND)
+        del dtrain
+
+        # Same estimator type as the in-memory path, so saving and serving are unchanged
+        self.models['generation'] = xgb.XGBRegressor()
+        self.models['generation'].load_model(bytearray(booster.save_raw()))
+        self.models.pop('generation_compiled', None)
+
+        # Evaluate on the held-out time range
+        mape, rmse, n_test = evaluate(booster, store_path, self.encoders['region'], self.scalers['generation'],
+                                      test_filter, batch_rows)
+        print(f"Trained on {n_train:,} rows, evaluated on {n_test:,}")
+        print(f"Generation MAPE: {mape:.4f}, RMSE: {rmse:.4f}")
+
+        return mape, rmse
+
     def train_demand_forecast_model(self):
         """Train simple statistical model for demand forecasting"""
         print("\nTraining Demand Forecast Model (Statistical)...")
         
-        demand_data = self.df[['timestamp', 'demand', 'region', 'hour']].dropna()
-        
-        # Calculate hourly averages by region (same as price model)
-        self.models['demand'] = {}
-        total_mape = 0
-        region_count = 0
-        
-        for region in demand_data['region'].unique():
-            region_data = demand_data[demand_data['region'] == region].copy()
-            hourly_avg = region_data.groupby('hour')['demand'].mean()
-            self.models['demand'][region] = hourly_avg
-            region_count += 1
-            total_mape += 0.15  # Assume 15% MAPE
-        
+        demand_data = self.df[['timestamp', 'demand', 'region']].dropna()
+
+        # Hourly averages by region in one grouped reduction (same as price model)
+        self.models['demand'] = HourlyProfileModel().fit(demand_data, 'demand')
+        region_count = len(self.models['demand'].regions)
+        total_mape = 0.15 * region_count  # Assume 15% MAPE
+
         avg_mape = total_mape / region_count
         print(f"Demand MAPE: {avg_mape:.2f}")
         return avg_mape
@@ -109,18 +201,12 @@ class RenewableEnergyAIModel:
         price_data = self.df[['timestamp', 'price', 'region', 'hour']].dropna()
 
         # Calculate hourly averages by region
-        self.models['price'] = {}
+        self.models['price'] = HourlyProfileModel().fit(price_data, 'price')
+        price_data = price_data.assign(prediction=self.models['price'].predict(price_data['timestamp'], price_data['region']))
         total_mape = 0
         region_count = 0
 
-        for region in price_data['region'].unique():
-            region_data = price_data[price_data['region'] == region].copy()
-
-            # Calculate average price by hour
-            hourly_avg = region_data.groupby('hour')['price'].mean()
-
-            self.models['price'][region] = hourly_avg
-
+        for region, region_data in price_data.groupby('region', sort=False, observed=True):
             # Evaluate using cross-validation approach
             region_mape = 0
             n_folds = 5
@@ -130,10 +216,7 @@ class RenewableEnergyAIModel:
                 split_idx = int(len(region_data) * (fold + 1) / n_folds)
                 test_data = region_data.iloc[split_idx - split_idx//n_folds:split_idx]
 
-                # Predict using hourly averages
-                predictions = test_data['hour'].map(hourly_avg)
-
-                fold_mape = mean_absolute_percentage_error(test_data['price'], predictions)
+                fold_mape = mean_absolute_percentage_error(test_data['price'], test_data['prediction'])
                 region_mape += fold_mape
 
             region_mape /= n_folds
@@ -145,20 +228,37 @@ class RenewableEnergyAIModel:
 
         return avg_mape
 
-    def train_all_models(self):
-        """Train all forecasting models"""
+    def train_all_models(self, n_jobs=1, external_memory=False):
+        """Train all forecasting models.
+
+        With `n_jobs` > 1 (None = one per CPU) the targets are fitted
+        concurrently in a process pool and their artifacts merged back. With
+        `external_memory` the generation model streams from the store via
+        train_generation_forecast_model_external(), and unless the dataset is
+        already loaded, demand and price read only their TRAINING_COLUMNS.
+        """
         print("Starting AI Model Training Pipeline...")
 
         results = {}
-
-        # Train generation forecast
-        results['generation'] = self.train_generation_forecast_model()
-
-        # Train demand forecast
-        results['demand'] = self.train_demand_forecast_model()
-
-        # Train price forecast
-        results['price'] = self.train_price_forecast_model()
+        targets = list(TRAINING_COLUMNS)
+        frame = None
+
+        if external_memory:
+            # Streams from the store instead of self.df
+            results['generation'] = self.train_generation_forecast_model_external()
+            targets.remove('generation')
+            if self._df is None:
+                frame = self._read_training_columns(targets)
+
+        if n_jobs is None or n_jobs > 1:
+            results.update(self._train_targets_parallel(targets, n_jobs, frame))
+        elif frame is not None:
+            for target in targets:
+                results[target] = self._merge_target(*_train_target(target, frame[TRAINING_COLUMNS[target]]))
+        else:
+            # Train generation, demand and price forecasts in turn
+            for target in targets:
+                results[target] = getattr(self, f'train_{target}_forecast_model')()
 
         print("\n" + "="*50)
         print("MODEL TRAINING COMPLETE")
@@ -169,15 +269,140 @@ class RenewableEnergyAIModel:
 
         return results
 
+    def _read_training_columns(self, targets):
+        """Just the columns `targets` train on, read from the store (or CSV) without loading self.df"""
+        columns = {column for target in targets for column in TRAINING_COLUMNS[target]}
+        value_columns = sorted(columns - {'timestamp', 'region', 'hour'})
+        print(f"Reading {', '.join(value_columns)} for {', '.join(targets)} training...")
+
+        source = dataset_store.resolve_data_path(self.data_path)
+        if dataset_store.is_store(source):
+            frame = dataset_store.load_dataset(source, columns=value_columns)
+        else:
+            frame = pd.read_csv(source, usecols=['timestamp', 'region'] + value_columns, parse_dates=['timestamp'])
+        if 'hour' in columns:
+            frame['hour'] = frame['timestamp'].dt.hour
+        return frame
+
+    def _merge_target(self, target, score, models, scalers):
+        """Adopt the artifacts of a target fitted by _train_target; returns its score"""
+        if 'generation' in models:
+            self.models.pop('generation_compiled', None)
+        self.models.update(models)
+        self.scalers.update(scalers)
+        return score
+
+    def _train_targets_parallel(self, targets, n_jobs=None, frame=None):
+        """Fit each target in its own pool process and merge models/scalers back.
+
+        Targets train on `frame` when given, otherwise on self.df.
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        n_workers = min(n_jobs or os.cpu_count() or 1, len(targets))
+        print(f"Training {', '.join(targets)} in parallel on {n_workers} processes")
+
+        # spawn, not fork: XGBoost's OpenMP runtime is not fork-safe
+        context = multiprocessing.get_context('spawn')
+        frame = self.df if frame is None else frame
+        results = {}
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as pool:
+            futures = [pool.submit(_train_target, target, frame[TRAINING_COLUMNS[target]]) for target in targets]
+            for future in futures:
+                target, score, models, scalers = future.result()
+                results[target] = self._merge_target(target, score, models, scalers)
+        return results
+
+    def update_models(self, new_df, n_new_trees=20, append=True):
+        """Incrementally update loaded models with newly arrived rows.
+
+        Boosting continues from the current generation booster for
+        `n_new_trees` rounds on the new rows only (the scaler and region
+        encoding stay fixed, so existing trees keep their meaning), and the
+        demand/price profiles absorb the new rows through their running sums
+        and counts. With `append` the rows are added to the dataset once
+        every model has been updated, so a failed update can be retried
+        without duplicating them. Cost is proportional to the new data, not
+        the archive.
+        """
+        print(f"Updating models with {len(new_df):,} new rows...")
+        new_df = new_df.copy()
+        new_df['timestamp'] = pd.to_datetime(new_df['timestamp'])
+        results = {'rows': len(new_df)}
+
+        # Generation: warm-start boosting on the new rows
+        if 'generation' in self.models:
+            known = new_df['region'].isin(self.encoders['region'].classes_)
+            if not known.all():
+                print(f"Skipping {int((~known).sum())} generation rows from regions the model was not trained on")
+            gen_data = new_df[known].dropna(subset=GENERATION_COLUMNS)
+
+            if len(gen_data):
+                gen_data = gen_data.assign(
+                    hour=gen_data['timestamp'].dt.hour,
+                    month=gen_data['timestamp'].dt.month,
+                    weekday=gen_data['timestamp'].dt.weekday,
+                    region_encoded=self.encoders['region'].transform(gen_data['region'].astype(str))
+                )
+                X_scaled = self.scalers['generation'].transform(gen_data[GENERATION_FEATURES])
+                y = gen_data['generation'].values
+
+                # Skill on the new rows before they are learned
+                results['generation_mape_before'] = mean_absolute_percentage_error(
+                    y, self.models['generation'].predict(X_scaled))
+
+                model = self.models['generation']
+                booster = model.get_booster()
+                model.set_params(n_estimators=n_new_trees)
+                model.fit(X_scaled, y, xgb_model=booster)
+                results['generation_trees'] = model.get_booster().num_boosted_rounds()
+                if 'generation_compiled' in self.models:
+                    self.compile_generation_model()
+                print(f"Generation booster now has {results['generation_trees']} trees")
+
+        # Demand/price: fold the new rows into the running profile sums
+        for name in ('demand', 'price'):
+            if isinstance(self.models.get(name), HourlyProfileModel) and name in new_df.columns:
+                rows = new_df[['timestamp', 'region', name]].dropna()
+                self.models[name].partial_fit(rows, name)
+                results[f'{name}_rows'] = len(rows)
+
+        if append:
+            self.append_data(new_df)
+
+        return results
+
+    def append_data(self, new_df):
+        """Append rows to the columnar store, or to the CSV when there is no store"""
+        source = dataset_store.resolve_data_path(self.data_path)
+        if dataset_store.is_store(source):
+            part_name = 'update-' + pd.Timestamp.now().strftime('%Y%m%dT%H%M%S%f')
+            dataset_store.write_dataset(new_df, source, part_name=part_name, overwrite=False)
+        else:
+            if os.path.exists(source):
+                # Match the existing header's column order
+                new_df = new_df.reindex(columns=pd.read_csv(source, nrows=0).columns)
+                new_df.to_csv(source, mode='a', header=False, index=False)
+            else:
+                new_df.to_csv(source, index=False)
+        # The cached training frame no longer matches the dataset
+        self._df = None
+        print(f"Appended {len(new_df):,} rows to {source}")
+
     def forecast_generation(self, features_df):
         """Generate renewable generation forecasts"""
         if 'generation' not in self.models:
             raise ValueError("Generation model not trained")
 
+        # Flattened trees with the scaler folded in: same predictions, a fraction of the per-call overhead on small batches
+        compiled = self.models.get('generation_compiled')
+        if compiled is not None and len(features_df) <= COMPILED_MAX_ROWS:
+            X = np.column_stack([features_df[name].to_numpy(dtype=np.float64) for name in GENERATION_FEATURES])
+            return compiled.predict(X)
+
         # Prepare features
-        feature_cols = ['hour', 'month', 'weekday', 'temperature', 'wind_speed',
-                       'solar_irradiance', 'humidity', 'region_encoded']
-        X = features_df[feature_cols]
+        X = features_df[GENERATION_FEATURES]
 
         # Scale and predict
         X_scaled = self.scalers['generation'].transform(X)
@@ -185,72 +410,116 @@ class RenewableEnergyAIModel:
 
         return predictions
 
-    def forecast_demand(self, timestamps, regions):
+    def forecast_demand(self, timestamps, regions, rng=None):
         """Generate demand forecasts using statistical model"""
         if 'demand' not in self.models:
             # Use simple statistical forecast if model not trained
-            predictions = []
-            for ts, region in zip(timestamps, regions):
-                # Simple demand pattern based on hour
-                base_demand = 8 + 4 * np.sin(2 * np.pi * ts.hour / 24)
-                predictions.append(base_demand + np.random.normal(0, 0.5))
-            return np.array(predictions)
-
-        predictions = []
-        for ts, region in zip(timestamps, regions):
-            hour = ts.hour
-            if region in self.models['demand']:
-                pred = self.models['demand'][region].get(hour, 8.0)  # Default demand
-                predictions.append(pred)
-            else:
-                # Fallback to simple pattern
-                base_demand = 8 + 4 * np.sin(2 * np.pi * ts.hour / 24)
-                predictions.append(base_demand + np.random.normal(0, 0.5))
+            return baseline_demand(pd.DatetimeIndex(timestamps).hour.values, rng)
 
-        return np.array(predictions)
+        return self._forecast_from_profile(self.models['demand'], timestamps, regions, 8.0, baseline_demand, rng)
 
-    def forecast_price(self, timestamps, regions):
+    def forecast_price(self, timestamps, regions, rng=None):
         """Generate price forecasts using statistical model"""
         if 'price' not in self.models:
             # Use simple price pattern if model not trained
-            predictions = []
-            for ts, region in zip(timestamps, regions):
-                # Simple price pattern: higher during peak hours
-                base_price = 3500 + 1000 * np.sin(2 * np.pi * (ts.hour - 6) / 12)
-                predictions.append(max(2000, base_price + np.random.normal(0, 200)))
-            return np.array(predictions)
-
-        predictions = []
-        for ts, region in zip(timestamps, regions):
-            hour = ts.hour
-            if region in self.models['price']:
-                pred = self.models['price'][region].get(hour, 4000)  # Default price
-                predictions.append(pred)
-            else:
-                # Fallback to simple pattern
-                base_price = 3500 + 1000 * np.sin(2 * np.pi * (hour - 6) / 12)
-                predictions.append(max(2000, base_price + np.random.normal(0, 200)))
+            return baseline_price(pd.DatetimeIndex(timestamps).hour.values, rng)
+
+        return self._forecast_from_profile(self.models['price'], timestamps, regions, 4000, baseline_price, rng)
+
+    def _forecast_from_profile(self, profile, timestamps, regions, default, baseline, rng=None):
+        """Batch profile lookup; unknown regions fall back to the baseline pattern"""
+        regions = np.asarray(regions, dtype=object)
+        predictions = profile.predict(timestamps, regions)
+
+        known = np.isin(regions, profile.regions)
+        predictions[known & np.isnan(predictions)] = default
+        if not known.all():
+            hours = pd.DatetimeIndex(timestamps).hour.values
+            predictions[~known] = baseline(hours[~known], rng)
 
-        return np.array(predictions)
+        return predictions
 
     def save_models(self, path='models/'):
         """Save trained models"""
         import os
         os.makedirs(path, exist_ok=True)
 
+        saved = []
+
         # Save XGBoost model
         if 'generation' in self.models:
             self.models['generation'].save_model(f'{path}generation_model.json')
+            saved.append('generation_model.json')
 
         # Save scalers and encoders
         import joblib
         for name, scaler in self.scalers.items():
             joblib.dump(scaler, f'{path}{name}_scaler.pkl')
+            saved.append(f'{name}_scaler.pkl')
 
         for name, encoder in self.encoders.items():
             joblib.dump(encoder, f'{path}{name}_encoder.pkl')
-
-        print(f"Models saved to {path}")
+            saved.append(f'{name}_encoder.pkl')
+
+        # Save demand/price hourly profiles
+        for name in ('demand', 'price'):
+            if isinstance(self.models.get(name), HourlyProfileModel):
+                self.models[name].save(f'{path}{name}_profile.npz')
+                saved.append(f'{name}_profile.npz')
+
+        # Everything above again as one memory-mappable file, which load_models() prefers
+        from model_bundle import BUNDLE_FILE, write_bundle
+        bundle_version = write_bundle(f'{path}{BUNDLE_FILE}', self.models, self.scalers, self.encoders)
+        saved.append(BUNDLE_FILE)
+        print(f"Model bundle written (bundle version {bundle_version})")
+
+        # Manifest goes last; model registries reload when it changes
+        from model_registry import write_manifest
+        version = write_manifest(path, saved)
+
+        print(f"Models saved to {path} (version {version})")
+        return version
+
+    def load_models(self, path='models/', compile_trees=False):
+        """Load persisted models, scalers and encoders without touching the dataset.
+
+        With `compile_trees` the generation booster is also flattened into a
+        CompiledTreeModel, which forecast_generation() then uses for batches of
+        up to COMPILED_MAX_ROWS rows. When
+        the directory holds a model bundle, everything is loaded from it
+        instead, with arrays memory-mapped rather than copied. The booster is
+        always deserialized into process-private memory; the mapped compiled
+        trees are kept (and shared between processes) only with `compile_trees`."""
+        import joblib
+        from model_bundle import BUNDLE_FILE, read_bundle
+
+        if os.path.exists(f'{path}{BUNDLE_FILE}'):
+            _, models, scalers, encoders = read_bundle(f'{path}{BUNDLE_FILE}')
+            if not compile_trees:
+                models.pop('generation_compiled', None)
+            self.models.update(models)
+            self.scalers.update(scalers)
+            self.encoders.update(encoders)
+            return
+
+        self.models['generation'] = xgb.XGBRegressor()
+        self.models['generation'].load_model(f'{path}generation_model.json')
+        self.scalers['generation'] = joblib.load(f'{path}generation_scaler.pkl')
+        self.encoders['region'] = joblib.load(f'{path}region_encoder.pkl')
+        if compile_trees:
+            self.compile_generation_model()
+
+        # Profiles are optional; older artifact sets only have the generation model
+        for name in ('demand', 'price'):
+            if os.path.exists(f'{path}{name}_profile.npz'):
+                self.models[name] = HourlyProfileModel.load(f'{path}{name}_profile.npz')
+
+    def compile_generation_model(self):
+        """Flatten the generation booster and its scaler for low-latency inference"""
+        from tree_compiler import CompiledTreeModel
+        self.models['generation_compiled'] = CompiledTreeModel.from_booster(
+            self.models['generation'], self.scalers.get('generation'))
+        return self.models['generation_compiled']
 
     def plot_forecasts(self, save_path='forecast_plots/'):
         """Generate forecast visualization plots"""
@@ -304,6 +573,13 @@ class RenewableEnergyAIModel:
 
         print(f"Plots saved to {save_path}")
 
+def _train_target(target, df):
+    """Pool worker: fit one target on its training columns; returns (target, score, models, scalers)"""
+    model = RenewableEnergyAIModel(inference_only=True)
+    model.df = df
+    score = getattr(model, f'train_{target}_forecast_model')()
+    return target, score, model.models, model.scalers
+
 if __name__ == "__main__":
     # Train the AI models
     ai_model = RenewableEnergyAIModel()
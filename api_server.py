@@ -1,15 +1,44 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from optimization_model_fixed import RenewableEnergyOptimizer
+from model_registry import ModelRegistry
+from job_queue import JobManager, QueueFullError, SUCCEEDED, FAILED
+from result_cache import ResultCache
+import metrics
+from serialization import FORMATS, column_values, negotiate_format, serialize_results, to_ndjson, to_records
+import contextlib
+import fcntl
 import json
 import numpy as np
 import pandas as pd
 import os
+import threading
+import time
 
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:8082', 'http://localhost:3000', 'http://localhost:5173', 'https://grid-zenith-flow.vercel.app'], methods=['GET', 'POST', 'OPTIONS'], allow_headers=['Content-Type'])
 
-optimizer = RenewableEnergyOptimizer()
+# COMPILE_TREES=1 serves small generation batches from the flattened tree predictor. With a model
+# bundle those trees are memory-mapped and shared between workers; the XGBoost booster never is
+registry = ModelRegistry('models/', compile_trees=os.environ.get('COMPILE_TREES', '0') == '1')
+optimizer = RenewableEnergyOptimizer(registry=registry, cache=ResultCache(os.environ.get('RESULT_CACHE_DIR', 'cache/')),
+                                     forecast_threads=int(os.environ.get('FORECAST_THREADS', 1)))
+optimizer.load_trained_models()  # warm the model registry before serving requests
+
+@app.before_request
+def start_request_timer():
+    request.start_time = time.perf_counter()
+    metrics.begin_request()
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - request.start_time
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe('http_request_duration_seconds', elapsed, endpoint=endpoint, method=request.method)
+    metrics.increment('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    # Streamed bodies are produced after this point, so their header covers setup only
+    response.headers['Server-Timing'] = metrics.server_timing(metrics.request_spans(), total=elapsed)
+    return response
 
 def convert_numpy_types(obj):
     """Convert numpy types to Python native types"""
@@ -27,43 +56,229 @@ def convert_numpy_types(obj):
         return [convert_numpy_types(item) for item in obj]
     return obj
 
+def ensure_models():
+    """Model snapshot for one request (trained on first run); read every artifact from it"""
+    return optimizer.current_snapshot()
+
+def request_range(data):
+    """(start_date, end_date, regions, seed) from a request body, with defaults; rejects empty ranges"""
+    start_date, end_date = data.get('start_date', '2024-01-01'), data.get('end_date', '2024-01-02')
+    regions = data.get('regions', ['North', 'South'])
+    if pd.Timestamp(end_date) < pd.Timestamp(start_date) or not regions:
+        raise ValueError("Empty range: end_date is before start_date or no regions were given")
+    seed = data.get('seed')
+    return start_date, end_date, regions, int(seed) if seed is not None else None
+
+def run_pipeline(data):
+    """Run the optimization pipeline for a request body; returns (results, summary, model_version)"""
+    snapshot = ensure_models()
+    results, summary = optimizer.run_optimization(*request_range(data), snapshot=snapshot)
+    return results, summary, snapshot.version
+
+def stream_pipeline(data):
+    """NDJSON body: dispatch rows as each chunk finishes, then a summary trailer line"""
+    try:
+        snapshot = ensure_models()
+        chunk_hours = data.get('chunk_hours')
+        for item in optimizer.iter_optimization(*request_range(data), snapshot=snapshot,
+                                                chunk_hours=int(chunk_hours) if chunk_hours is not None else None):
+            if isinstance(item, dict):
+                trailer = {'success': True, 'model_version': snapshot.version,
+                           'summary': convert_numpy_types(item)}
+                yield json.dumps(trailer) + '\n'
+            else:
+                yield to_ndjson(item)
+    except Exception as e:
+        # Headers are already sent; report the failure in-band as the trailer
+        yield json.dumps({'success': False, 'error': str(e)}) + '\n'
+
+def optimization_payload(data):
+    """Run the pipeline and build the row-records response payload"""
+    results, summary, model_version = run_pipeline(data)
+    with metrics.span('serialize'):
+        return {
+            'success': True,
+            'model_version': model_version,
+            'summary': convert_numpy_types(summary),
+            'results': to_records(results)
+        }
+
+# Incremental training reads uploaded CSVs only from this directory
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', 'uploads/')
+
+# Forecast response fields and the result columns they come from
+FORECAST_COLUMNS = {'timestamp': 'timestamp', 'region': 'region', 'generation': 'generation_forecast',
+                    'demand': 'demand_forecast', 'price': 'price_forecast'}
+
+def forecast_frame(data):
+    """Forecasts only, for explicit `rows` or a start_date/end_date/regions range; no dispatch or summary.
+
+    Returns (forecasts, model_version).
+    """
+    snapshot = ensure_models()
+    if 'rows' in data:
+        seed = data.get('seed')
+        forecasts = optimizer.forecast_rows(data['rows'], int(seed) if seed is not None else None, snapshot.ai_model)
+    else:
+        start_date, end_date, regions, seed = request_range(data)
+        forecasts = optimizer.generate_forecasts(start_date, end_date, regions, seed, snapshot.ai_model)
+    frame = pd.DataFrame({name: forecasts[column] for name, column in FORECAST_COLUMNS.items()})
+    return frame, snapshot.version
+
+def upload_path(name):
+    """Path of a file directly inside UPLOAD_DIR; anything else is rejected"""
+    root = os.path.realpath(UPLOAD_DIR)
+    path = os.path.realpath(os.path.join(root, str(name)))
+    if os.path.basename(str(name)) != str(name) or os.path.dirname(path) != root:
+        raise ValueError("'upload' must be the name of a file in the uploads directory")
+    if not os.path.isfile(path):
+        raise ValueError(f"No uploaded file named '{name}'")
+    return path
+
+# Model updates are read-modify-write cycles on the saved artifacts; this lock serializes them within a
+# process, and a lock file next to the model directory serializes them across server processes
+MODEL_UPDATE_LOCK = threading.Lock()
+
+@contextlib.contextmanager
+def model_update_lock():
+    """Held for a whole load -> update -> save -> append -> reload cycle"""
+    lock_path = optimizer.model_path.rstrip('/') + '.update.lock'
+    with MODEL_UPDATE_LOCK, open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file is closed
+        yield
+
+def incremental_update(data):
+    """Warm-start update of the saved models from the rows in a request body; returns the response payload"""
+    from ai_model_trainer_simple import RenewableEnergyAIModel
+
+    if 'rows' in data:
+        new_df = pd.DataFrame(data['rows'])
+    elif 'upload' in data:
+        new_df = pd.read_csv(upload_path(data['upload']))
+    else:
+        raise ValueError("Incremental training needs 'rows' or 'upload'")
+    new_df['timestamp'] = pd.to_datetime(new_df['timestamp'])
+
+    # Update a private copy so requests keep serving the current snapshot until the new one is saved.
+    # Under the lock, a concurrent update cannot save over this one after loading the same artifacts
+    with model_update_lock():
+        model = RenewableEnergyAIModel(optimizer.ai_model.data_path, inference_only=True)
+        model.load_models(optimizer.model_path)
+        results = model.update_models(new_df, n_new_trees=int(data.get('n_new_trees', 20)), append=False)
+        version = model.save_models(optimizer.model_path)
+        # Only now that the update is saved, so a retried request cannot append the rows twice
+        model.append_data(new_df)
+        optimizer.registry.reload()
+    return {'success': True, 'message': 'Model updated incrementally', 'model_version': version,
+            'update': convert_numpy_types(results)}
+
+# Background jobs for long horizons, so they don't pin a request worker
+jobs = JobManager(
+    handlers={'optimize': optimization_payload, 'train_incremental': incremental_update},
+    db_path=os.environ.get('JOB_DB_PATH', 'jobs.db'),
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_pending=int(os.environ.get('JOB_MAX_PENDING', 16))
+)
+
 @app.route('/api/optimize', methods=['POST'])
 def run_optimization():
     try:
-        # Train models if they don't exist
-        if not os.path.exists('models/generation_model.json'):
-            print("Training models on first run...")
-            os.makedirs('models', exist_ok=True)
-            optimizer.ai_model.train_all_models()
-            optimizer.ai_model.save_models()
-        
+        fmt = negotiate_format(request)
         data = request.get_json()
-        start_date = data.get('start_date', '2024-01-01')
-        end_date = data.get('end_date', '2024-01-02')
-        regions = data.get('regions', ['North', 'South'])
-        
-        results, summary = optimizer.run_optimization(start_date, end_date, regions)
-        
-        # Convert numpy types to JSON serializable types
-        summary_clean = convert_numpy_types(summary)
-        results_clean = convert_numpy_types(results.to_dict('records'))
-        
-        return jsonify({
-            'success': True,
-            'summary': summary_clean,
-            'results': results_clean
-        })
+        if fmt == 'ndjson':
+            # Validate before the headers go out; later errors are reported in the trailer
+            request_range(data)
+            return Response(stream_with_context(stream_pipeline(data)), mimetype=FORMATS['ndjson'])
+        if fmt == 'records':
+            return jsonify(optimization_payload(data))
+
+        # Columnar formats are encoded straight from the result arrays
+        results, summary, model_version = run_pipeline(data)
+        metadata = {'success': True, 'model_version': model_version,
+                    'summary': convert_numpy_types(summary), 'format': fmt}
+        with metrics.span('serialize'):
+            body, mimetype = serialize_results(results, metadata, fmt)
+        return Response(body, mimetype=mimetype)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/forecast', methods=['POST'])
+def batch_forecast():
+    try:
+        fmt = negotiate_format(request)
+        forecasts, model_version = forecast_frame(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+    metadata = {'success': True, 'model_version': model_version}
+    with metrics.span('serialize'):
+        if fmt == 'arrow':
+            body, mimetype = serialize_results(forecasts, metadata, fmt)
+            return Response(body, mimetype=mimetype)
+        # Every JSON format gets the same layout: one array per field
+        return jsonify({**metadata, 'n_rows': len(forecasts),
+                        'forecasts': {name: column_values(forecasts[name]) for name in forecasts.columns}})
+
+@app.route('/api/jobs/optimize', methods=['POST'])
+def submit_optimization_job():
+    try:
+        job_id = jobs.submit('optimize', request.get_json() or {})
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    return jsonify({'success': True, 'job_id': job_id, 'status_url': f'/api/jobs/{job_id}'}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.status(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job id'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = jobs.result(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job id'}), 404
+    if job['status'] == SUCCEEDED:
+        return jsonify(job['result'])
+    if job['status'] == FAILED:
+        return jsonify({'success': False, 'status': FAILED, 'error': job['error']})
+    return jsonify({'success': False, 'status': job['status'], 'error': 'Job has not finished yet'}), 202
+
 @app.route('/api/train', methods=['POST'])
 def train_model():
     try:
-        optimizer.ai_model.train_all_models()
-        optimizer.ai_model.save_models()
-        return jsonify({'success': True, 'message': 'Model trained successfully'})
+        data = request.get_json(silent=True) or {}
+        if data.get('mode') == 'incremental':
+            if data.get('async'):
+                if 'upload' in data:
+                    upload_path(data['upload'])  # reject bad names now rather than in the job
+                job_id = jobs.submit('train_incremental', data)
+                return jsonify({'success': True, 'job_id': job_id, 'status_url': f'/api/jobs/{job_id}'}), 202
+            return jsonify(incremental_update(data))
+
+        # Train a private model set; the served snapshot is never modified in place
+        from ai_model_trainer_simple import RenewableEnergyAIModel
+        with model_update_lock():
+            model = RenewableEnergyAIModel(optimizer.ai_model.data_path, inference_only=True)
+            model.train_all_models()
+            version = model.save_models(optimizer.model_path)
+            optimizer.registry.reload()
+        return jsonify({'success': True, 'message': 'Model trained successfully', 'model_version': version})
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.METRICS.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
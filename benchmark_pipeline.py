@@ -0,0 +1,251 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# Problem sizes: history length for data/training stages, horizon for serving stages
+DATA_DAYS = (30, 90, 365)
+HORIZON_HOURS = (24, 168, 720, 2160)
+REGION_COUNTS = (1, 3, 5)
+ALL_REGIONS = ['East', 'North', 'North-East', 'South', 'West']
+
+# Regressions are only reported when the stage is both relatively and absolutely slower
+DEFAULT_THRESHOLD = 0.25
+MIN_SECONDS = 0.005
+
+def time_call(fn, repeat=3):
+    """Best-of-`repeat` wall time of fn() with its printed progress suppressed; returns (seconds, result)"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+def size_key(n_regions, size):
+    return f'{n_regions}r_{size}'
+
+def scaling_exponent(sizes, seconds):
+    """Slope of log(time) vs log(size): ~1 is linear scaling, ~0 is size-independent"""
+    sizes, seconds = np.asarray(sizes, dtype=float), np.asarray(seconds, dtype=float)
+    if len(sizes) < 2 or (seconds <= 0).any():
+        return None
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+class PipelineBenchmark:
+    """Times each pipeline stage over a grid of history/horizon lengths and region counts.
+
+    Everything runs inside `workdir` (data, model artifacts, job table, result
+    cache), so benchmarks never touch the repository's models/ directory.
+    """
+
+    def __init__(self, workdir, repeat=3, data_days=DATA_DAYS, horizon_hours=HORIZON_HOURS,
+                 region_counts=REGION_COUNTS):
+        self.workdir = workdir
+        self.repeat = repeat
+        self.data_days = data_days
+        self.horizon_hours = horizon_hours
+        self.region_counts = region_counts
+        self.results = {}
+
+    def record(self, stage, n_regions, size, seconds):
+        self.results.setdefault(stage, {})[size_key(n_regions, size)] = seconds
+        print(f"  {stage:<20} regions={n_regions:<2} size={size:<6} {seconds * 1000:10.2f} ms")
+
+    def data_path(self, days, n_regions):
+        return os.path.join(self.workdir, f'bench_{days}d_{n_regions}r.csv')
+
+    def bench_data(self):
+        """Synthetic generation, CSV/store load and per-target training"""
+        from simple_data_processor import create_synthetic_dataset_vectorized
+        from ai_model_trainer_simple import RenewableEnergyAIModel
+        import dataset_store
+
+        print("Data and training stages (size = days of history)")
+        for n_regions in self.region_counts:
+            regions = ALL_REGIONS[:n_regions]
+            for days in self.data_days:
+                end_date = pd.Timestamp('2023-01-01') + pd.Timedelta(days=days) - pd.Timedelta(hours=1)
+                seconds, dataset = time_call(lambda: create_synthetic_dataset_vectorized(
+                    '2023-01-01', end_date, regions=regions, seed=0), self.repeat)
+                self.record('data_generation', n_regions, days, seconds)
+
+                path = self.data_path(days, n_regions)
+                dataset.to_csv(path, index=False)
+                dataset_store.write_dataset(dataset, dataset_store.store_path_for(path))
+
+                seconds, model = time_call(lambda: RenewableEnergyAIModel(path), self.repeat)
+                self.record('dataset_load', n_regions, days, seconds)
+
+                for target in ('generation', 'demand', 'price'):
+                    train = getattr(model, f'train_{target}_forecast_model')
+                    seconds, _ = time_call(train, self.repeat)
+                    self.record(f'train_{target}', n_regions, days, seconds)
+
+        # Serving stages use models trained on the largest history
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = RenewableEnergyAIModel(self.data_path(max(self.data_days), max(self.region_counts)))
+            model.train_all_models()
+            model.save_models(os.path.join(self.workdir, 'models', ''))
+
+    def bench_serving(self):
+        """Forecasting, dispatch and summary metrics of optimization_model"""
+        from optimization_model import RenewableEnergyOptimizer
+
+        print("Serving stages (size = horizon hours)")
+        optimizer = RenewableEnergyOptimizer(os.path.join(self.workdir, 'models', ''))
+        with contextlib.redirect_stdout(io.StringIO()):
+            optimizer.load_trained_models()
+
+        for n_regions in self.region_counts:
+            regions = ALL_REGIONS[:n_regions]
+            for hours in self.horizon_hours:
+                end_date = pd.Timestamp('2024-01-01') + pd.Timedelta(hours=hours - 1)
+                seconds, forecasts = time_call(lambda: optimizer.generate_forecasts(
+                    '2024-01-01', end_date, regions, seed=0), self.repeat)
+                self.record('generate_forecasts', n_regions, hours, seconds)
+
+                seconds, results = time_call(lambda: optimizer.optimize_dispatch(forecasts), self.repeat)
+                self.record('optimize_dispatch', n_regions, hours, seconds)
+
+                seconds, results_lp = time_call(lambda: optimizer.optimize_dispatch(
+                    forecasts, optimization_horizon=24, method='lp'), self.repeat)
+                self.record('optimize_dispatch_lp', n_regions, hours, seconds)
+
+                seconds, _ = time_call(lambda: optimizer.calculate_summary_metrics(results), self.repeat)
+                self.record('summary_metrics', n_regions, hours, seconds)
+
+    def bench_api(self):
+        """/api/optimize end to end through the Flask test client"""
+        print("API stage (size = horizon hours)")
+        cwd = os.getcwd()
+        os.chdir(self.workdir)
+        os.environ.setdefault('JOB_DB_PATH', os.path.join(self.workdir, 'jobs.db'))
+        os.environ.setdefault('RESULT_CACHE_DIR', os.path.join(self.workdir, 'cache', ''))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                import api_server
+            client = api_server.app.test_client()
+
+            for n_regions in self.region_counts:
+                for hours in self.horizon_hours:
+                    end_date = pd.Timestamp('2024-01-01') + pd.Timedelta(hours=hours - 1)
+                    # No seed: the result cache is bypassed, so every call does the full work
+                    body = {'start_date': '2024-01-01', 'end_date': str(end_date), 'regions': ALL_REGIONS[:n_regions]}
+                    for fmt in ('records', 'arrow'):
+                        seconds, response = time_call(lambda: client.post(f'/api/optimize?format={fmt}', json=body),
+                                                      self.repeat)
+                        if response.status_code != 200:
+                            raise RuntimeError(f"/api/optimize returned {response.status_code}")
+                        self.record(f'api_optimize_{fmt}', n_regions, hours, seconds)
+        finally:
+            os.chdir(cwd)
+
+    def run(self, stages=('data', 'serving', 'api')):
+        # Serving and API stages need the models trained by the data stage
+        if 'data' not in stages and not os.path.exists(os.path.join(self.workdir, 'models', 'generation_model.json')):
+            stages = ('data',) + tuple(stages)
+        for stage in stages:
+            getattr(self, f'bench_{stage}')()
+        return self.report()
+
+    def report(self):
+        scaling = {}
+        for stage, timings in self.results.items():
+            for n_regions in self.region_counts:
+                points = sorted((int(key.split('_')[1]), seconds) for key, seconds in timings.items()
+                                if key.startswith(f'{n_regions}r_'))
+                if points:
+                    sizes, seconds = zip(*points)
+                    scaling.setdefault(stage, {})[f'{n_regions}r'] = scaling_exponent(sizes, seconds)
+
+        return {
+            'meta': {
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+                'repeat': self.repeat
+            },
+            'results': self.results,
+            'scaling': scaling
+        }
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD, min_seconds=MIN_SECONDS):
+    """Stages slower than baseline by more than `threshold` (and `min_seconds`); list of dicts"""
+    regressions = []
+    for stage, timings in current['results'].items():
+        for key, seconds in timings.items():
+            reference = baseline['results'].get(stage, {}).get(key)
+            if reference is None:
+                continue
+            if seconds > reference * (1 + threshold) and seconds - reference > min_seconds:
+                regressions.append({'stage': stage, 'size': key, 'baseline': reference,
+                                    'current': seconds, 'ratio': seconds / reference})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the forecasting and dispatch pipeline')
+    parser.add_argument('--output', default='benchmarks/latest.json', help='where to write this run')
+    parser.add_argument('--baseline', default='benchmarks/baseline.json', help='baseline to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='also store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed relative slowdown per stage (0.25 = 25%%)')
+    parser.add_argument('--stages', nargs='+', default=['data', 'serving', 'api'], choices=['data', 'serving', 'api'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help='smaller size grid for a fast check')
+    args = parser.parse_args(argv)
+
+    grid = {}
+    if args.quick:
+        grid = {'data_days': DATA_DAYS[:2], 'horizon_hours': HORIZON_HOURS[:3], 'region_counts': REGION_COUNTS[::2]}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        current = PipelineBenchmark(workdir, repeat=args.repeat, **grid).run(tuple(args.stages))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    print("\nScaling exponents (log time / log size):")
+    for stage, exponents in current['scaling'].items():
+        print(f"  {stage:<20} " + '  '.join(f"{key}={value:.2f}" for key, value in exponents.items()
+                                            if value is not None))
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    if not regressions:
+        print(f"No stage regressed by more than {args.threshold:.0%} against {args.baseline}")
+        return 0
+
+    print(f"\n{len(regressions)} regressions beyond {args.threshold:.0%}:")
+    for r in sorted(regressions, key=lambda r: -r['ratio']):
+        print(f"  {r['stage']:<20} {r['size']:<10} {r['baseline'] * 1000:9.2f} ms -> "
+              f"{r['current'] * 1000:9.2f} ms ({r['ratio']:.2f}x)")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
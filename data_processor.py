@@ -135,6 +135,105 @@ class NLDCDataProcessor:
         
         return df
     
+    def _synthesize_chunk(self, timestamps, regions, rng):
+        """Vectorized synthetic rows for one block of timestamps x regions"""
+        n_times, n_regions = len(timestamps), len(regions)
+        shape = (n_times, n_regions)
+
+        # Time features, shape (T, 1); fractional hour keeps sub-hourly profiles smooth
+        hour = timestamps.hour.values[:, None]
+        hour_frac = hour + timestamps.minute.values[:, None] / 60
+        day_of_year = timestamps.dayofyear.values[:, None]
+        annual_wave = np.sin(2 * np.pi * day_of_year / 365)
+        daily_wave = np.sin(2 * np.pi * hour_frac / 24)
+
+        temperature = 25 + 10 * annual_wave + 8 * daily_wave + rng.normal(0, 2, shape)
+        wind_speed = np.maximum(0, 6 + 3 * annual_wave + 2 * daily_wave + rng.normal(0, 1.5, shape))
+
+        # Solar irradiance (daylight hours only)
+        daylight = (hour >= 6) & (hour <= 18)
+        solar_base = 800 * np.sin(np.pi * (hour_frac - 6) / 12)
+        seasonal_factor = 0.8 + 0.4 * annual_wave
+        solar_irradiance = np.where(
+            daylight, np.maximum(0, solar_base * seasonal_factor + rng.normal(0, 50, shape)), 0)
+
+        wind_generation = np.minimum(1.5, wind_speed * 0.2 + rng.normal(0, 0.1, shape))
+        solar_generation = solar_irradiance * 0.002 + rng.normal(0, 0.05, shape)
+        total_generation = np.maximum(0, wind_generation + solar_generation)
+
+        base_demand = 2.0 + 0.5 * annual_wave
+        daily_demand_pattern = 0.8 + 0.4 * (np.sin(2 * np.pi * (hour_frac - 6) / 24) + 1)
+        demand = base_demand * daily_demand_pattern + rng.normal(0, 0.1, shape)
+
+        supply_demand_ratio = np.divide(total_generation, demand, out=np.ones(shape), where=demand > 0)
+        price = np.maximum(1000, 3500 * (1.5 - supply_demand_ratio) + rng.normal(0, 200, shape))
+
+        storage_soc = np.clip(50 + 30 * daily_wave + rng.normal(0, 5, shape), 10, 90)
+
+        return pd.DataFrame({
+            'timestamp': np.repeat(timestamps.values, n_regions),
+            'region': np.tile(np.asarray(regions, dtype=object), n_times),
+            'temperature': temperature.round(2).ravel(),
+            'wind_speed': wind_speed.round(2).ravel(),
+            'solar_irradiance': solar_irradiance.round(2).ravel(),
+            'wind_generation': wind_generation.round(3).ravel(),
+            'solar_generation': solar_generation.round(3).ravel(),
+            'total_generation': total_generation.round(3).ravel(),
+            'demand': demand.round(3).ravel(),
+            'price': price.round(2).ravel(),
+            'storage_soc': storage_soc.round(1).ravel(),
+            'hour': np.repeat(hour.ravel(), n_regions),
+            'month': np.repeat(timestamps.month.values, n_regions),
+            'weekday': np.repeat(timestamps.weekday.values, n_regions)
+        })
+
+    def iter_synthetic_chunks(self, start_date='2019-01-01', end_date='2023-12-31', freq='h',
+                              chunk_span='30D', regions=None, seed=None):
+        """Yield the synthetic dataset as consecutive fixed-span time chunks.
+
+        Only one chunk of timestamps and rows exists at a time, so memory is
+        bounded by `chunk_span` x regions regardless of the overall range.
+        """
+        if regions is None:
+            regions = ['Northern', 'Southern', 'Eastern', 'Western', 'North-Eastern']
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+        step = pd.tseries.frequencies.to_offset(freq)
+        chunk_start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date)
+        # Count the periods in the first span with date_range, which (unlike Timedelta
+        # arithmetic) also handles calendar frequencies such as 'W' or 'MS'
+        span_end = chunk_start + pd.tseries.frequencies.to_offset(chunk_span)
+        periods_per_chunk = max(1, len(pd.date_range(chunk_start, span_end, freq=step, inclusive='left')))
+
+        while chunk_start <= end:
+            timestamps = pd.date_range(chunk_start, periods=periods_per_chunk, freq=step)
+            timestamps = timestamps[timestamps <= end]
+            if len(timestamps) == 0:
+                break
+            yield self._synthesize_chunk(timestamps, regions, rng)
+            chunk_start = timestamps[-1] + step
+
+    def generate_synthetic_data_streaming(self, output_dir='synthetic_parts', start_date='2019-01-01',
+                                          end_date='2023-12-31', freq='h', chunk_span='30D',
+                                          regions=None, seed=None):
+        """Stream synthetic data to one CSV partition per time chunk"""
+        print(f"Streaming synthetic dataset to {output_dir}/ in {chunk_span} chunks at {freq} resolution...")
+        os.makedirs(output_dir, exist_ok=True)
+
+        paths = []
+        total_rows = 0
+        chunks = self.iter_synthetic_chunks(start_date, end_date, freq, chunk_span, regions, seed)
+        for i, chunk in enumerate(chunks):
+            chunk_start = chunk['timestamp'].iloc[0]
+            path = os.path.join(output_dir, f"part-{i:05d}_{chunk_start:%Y%m%dT%H%M}.csv")
+            chunk.to_csv(path, index=False)
+            paths.append(path)
+            total_rows += len(chunk)
+
+        print(f"Wrote {total_rows:,} rows across {len(paths)} partitions")
+        return paths
+
     def get_summary_statistics(self, df):
         """Generate summary statistics for the dataset"""
         print("\n=== DATASET SUMMARY ===")
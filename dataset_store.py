@@ -0,0 +1,169 @@
+import os
+import shutil
+from urllib.parse import unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+
+# Columnar store layout: <store>/region=<name>/year=<yyyy>/part-*.parquet
+PARTITION_COLUMNS = ['region', 'year']
+PARTITION_SCHEMA = pa.schema([('region', pa.dictionary(pa.int32(), pa.string())), ('year', pa.int32())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+def store_path_for(csv_path):
+    """Default store directory that sits next to a CSV dataset"""
+    return os.path.splitext(csv_path)[0] + '_store'
+
+def is_store(path):
+    """True if `path` is a partitioned dataset store directory"""
+    return os.path.isdir(path)
+
+def resolve_data_path(data_path):
+    """Prefer the columnar store over the CSV it was converted from"""
+    if is_store(data_path):
+        return data_path
+    store_path = store_path_for(data_path)
+    if is_store(store_path):
+        return store_path
+    return data_path
+
+def _to_table(df):
+    """Typed Arrow table with a year partition key and categorical regions"""
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['year'] = df['timestamp'].dt.year.astype('int32')
+    df['region'] = df['region'].astype('category')
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def write_dataset(df, store_path, part_name='part', overwrite=True):
+    """Write a DataFrame into the store, partitioned by region and year"""
+    behavior = 'delete_matching' if overwrite else 'overwrite_or_ignore'
+    ds.write_dataset(
+        _to_table(df), store_path,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=f'{part_name}-{{i}}.parquet',
+        existing_data_behavior=behavior
+    )
+
+def convert_csv_to_store(csv_path='renewable_5yr_hourly.csv', store_path=None, block_size=64 << 20):
+    """Convert a CSV dataset into the columnar store block by block.
+
+    Blocks are written to a temporary directory that then replaces the whole
+    store, so no partition of a previous conversion survives and readers
+    never see a half-written store.
+    """
+    store_path = (store_path or store_path_for(csv_path)).rstrip(os.sep)
+    print(f"Converting {csv_path} to columnar store at {store_path}...")
+
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(column_types={'timestamp': pa.timestamp('ns')})
+    )
+
+    tmp_path = f'{store_path}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    total_rows = 0
+    try:
+        for i, batch in enumerate(reader):
+            write_dataset(batch.to_pandas(), tmp_path, part_name=f'part-{i:05d}', overwrite=False)
+            total_rows += batch.num_rows
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    _replace_dir(tmp_path, store_path)
+
+    print(f"Converted {total_rows:,} rows")
+    return store_path
+
+def _replace_dir(src, dst):
+    """Move directory `src` to `dst`, replacing any existing `dst`"""
+    old_path = f'{dst}.old-{os.getpid()}'
+    if os.path.exists(dst):
+        os.rename(dst, old_path)
+    os.rename(src, dst)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def _open(store_path):
+    partitioning = ds.partitioning(PARTITION_SCHEMA, flavor='hive', dictionaries='infer')
+    return ds.dataset(store_path, format='parquet', partitioning=partitioning)
+
+def store_regions(store_path):
+    """Region names present in the store, read from the partition directories"""
+    # Hive partitioning URI-encodes values in directory names (e.g. spaces as %20)
+    return sorted(unquote(name.split('=', 1)[1]) for name in os.listdir(store_path) if name.startswith('region='))
+
+def time_range(store_path):
+    """(min, max) timestamp in the store, scanning only the timestamp column"""
+    import pyarrow.compute as pc
+
+    lo = hi = None
+    for batch in _open(store_path).to_batches(columns=['timestamp']):
+        if batch.num_rows == 0:
+            continue
+        bounds = pc.min_max(batch.column('timestamp'))
+        batch_lo, batch_hi = bounds['min'].as_py(), bounds['max'].as_py()
+        lo = batch_lo if lo is None else min(lo, batch_lo)
+        hi = batch_hi if hi is None else max(hi, batch_hi)
+    return pd.Timestamp(lo), pd.Timestamp(hi)
+
+def iter_batches(store_path, columns=None, filter=None, batch_rows=1 << 20):
+    """Stream the store as DataFrames of roughly `batch_rows` rows.
+
+    Partition fragments are small (one region-year each), so consecutive
+    record batches are coalesced up to `batch_rows` before conversion.
+    Only one batch is materialized at a time; rows are not globally sorted.
+    """
+    if columns is not None:
+        columns = ['timestamp', 'region'] + [c for c in columns if c not in ('timestamp', 'region')]
+
+    pending, pending_rows = [], 0
+    for batch in _open(store_path).to_batches(columns=columns, filter=filter):
+        if batch.num_rows == 0:
+            continue
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= batch_rows:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, pending_rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+def load_dataset(store_path, columns=None, regions=None, years=None):
+    """Load selected columns and partitions from the store.
+
+    `columns` limits which columns are decoded (timestamp and region are
+    always included); `regions` and `years` prune whole partitions.
+    """
+    dataset = _open(store_path)
+
+    if columns is not None:
+        columns = ['timestamp', 'region'] + [c for c in columns if c not in ('timestamp', 'region')]
+
+    filters = []
+    if regions is not None:
+        filters.append(ds.field('region').isin(list(regions)))
+    if years is not None:
+        filters.append(ds.field('year').isin([int(y) for y in years]))
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+
+    table = dataset.to_table(columns=columns, filter=expression)
+    df = table.to_pandas()
+    # Partition discovery order is arbitrary; keep categories sorted like LabelEncoder
+    df['region'] = df['region'].cat.set_categories(sorted(df['region'].cat.categories))
+    if 'year' in df.columns and (columns is None or 'year' not in columns):
+        df = df.drop(columns='year')
+
+    # Partitions come back grouped by region; restore time order
+    return df.sort_values(['timestamp', 'region'], kind='stable').reset_index(drop=True)
+
+if __name__ == "__main__":
+    import sys
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'renewable_5yr_hourly.csv'
+    store_path = sys.argv[2] if len(sys.argv) > 2 else None
+    convert_csv_to_store(csv_path, store_path)
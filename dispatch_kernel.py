@@ -0,0 +1,111 @@
+import numpy as np
+
+# Decision arrays returned by rule_based_dispatch, in results-table order
+DECISIONS = ['battery_charge', 'battery_discharge', 'hydro_discharge', 'grid_import', 'grid_export',
+             'final_soc_battery', 'final_soc_hydro']
+
+def _hour_rules(generation, demand, price, battery_soc, hydro_soc):
+    """Price-threshold storage rules of _optimize_single_hour, on arrays or scalars"""
+    net_demand = demand - generation
+    high = price > 4500
+    low = price < 3000
+    normal = ~high & ~low
+    deficit = net_demand > 0
+
+    battery_out = np.minimum(battery_soc * 0.1, 0.5)
+    battery_room = np.minimum((100 - battery_soc) * 0.1, 0.5)
+
+    # High price: discharge battery, top up from hydro, export any excess
+    high_hydro = np.where(net_demand > battery_out, np.minimum(hydro_soc * 0.15, net_demand - battery_out), 0)
+    high_export = np.maximum(0, generation + battery_out + high_hydro - demand)
+
+    # Low price: charge battery, limited by the surplus when there is one
+    excess = generation - demand
+    low_charge = np.where(excess > 0, np.minimum(excess, battery_room), battery_room)
+
+    # Normal price: cover part of a deficit from storage, or bank part of a surplus
+    storage_used = np.minimum(battery_soc * 0.1 + hydro_soc * 0.15, net_demand * 0.5)
+    deficit_battery = np.minimum(battery_soc * 0.1, storage_used * 0.6)
+    deficit_hydro = np.minimum(hydro_soc * 0.15, storage_used * 0.4)
+    deficit_import = np.maximum(0, net_demand - deficit_battery - deficit_hydro)
+    surplus = -net_demand
+    surplus_charge = np.minimum((100 - battery_soc) * 0.1, surplus * 0.7)
+
+    battery_charge = np.where(low, low_charge, np.where(normal & ~deficit, surplus_charge, 0))
+    battery_discharge = np.where(high, battery_out, np.where(normal & deficit, deficit_battery, 0))
+    hydro_discharge = np.where(high, high_hydro, np.where(normal & deficit, deficit_hydro, 0))
+    grid_import = np.where(normal & deficit, deficit_import, 0)
+    grid_export = np.where(high, high_export, np.where(normal & ~deficit, surplus - surplus_charge, 0))
+
+    return battery_charge, battery_discharge, hydro_discharge, grid_import, grid_export
+
+def rule_based_dispatch(generation, demand, price, battery_soc=50, hydro_soc=60, carry_soc=False):
+    """Array implementation of the rule-based dispatch policy.
+
+    Takes system-wide per-hour generation/demand/price arrays (any leading
+    batch dimensions, time last) and returns a dict of arrays keyed by
+    DECISIONS. With carry_soc=False every hour starts from the given SoC,
+    exactly like the per-hour loop, and the whole input is evaluated in one
+    vectorized pass. With carry_soc=True each hour starts from the previous
+    hour's final SoC, stepping along the time axis over preallocated arrays.
+    """
+    generation = np.asarray(generation, dtype=float)
+    demand = np.asarray(demand, dtype=float)
+    price = np.asarray(price, dtype=float)
+
+    if not carry_soc:
+        decisions = _hour_rules(generation, demand, price, battery_soc, hydro_soc)
+        result = dict(zip(DECISIONS[:5], decisions))
+        result['final_soc_battery'] = battery_soc + result['battery_charge'] - result['battery_discharge']
+        result['final_soc_hydro'] = hydro_soc - result['hydro_discharge']
+        return result
+
+    if generation.ndim == 1:
+        return _carry_scalar(generation, demand, price, float(battery_soc), float(hydro_soc))
+
+    result = {name: np.empty(generation.shape) for name in DECISIONS}
+    battery = np.broadcast_to(np.asarray(battery_soc, dtype=float), generation.shape[:-1]).copy()
+    hydro = np.broadcast_to(np.asarray(hydro_soc, dtype=float), generation.shape[:-1]).copy()
+
+    for t in range(generation.shape[-1]):
+        decisions = _hour_rules(generation[..., t], demand[..., t], price[..., t], battery, hydro)
+        for name, values in zip(DECISIONS[:5], decisions):
+            result[name][..., t] = values
+        battery = battery + decisions[0] - decisions[1]
+        hydro = hydro - decisions[2]
+        result['final_soc_battery'][..., t] = battery
+        result['final_soc_hydro'][..., t] = hydro
+
+    return result
+
+def _carry_scalar(generation, demand, price, battery_soc, hydro_soc):
+    """Single-series SoC-carrying loop on Python floats, writing into preallocated arrays"""
+    n = len(generation)
+    out = np.zeros((len(DECISIONS), n))
+    for t, (g, d, p) in enumerate(zip(generation.tolist(), demand.tolist(), price.tolist())):
+        net_demand = d - g
+        charge = discharge = hydro_out = grid_in = grid_out = 0.0
+
+        if p > 4500:
+            discharge = min(battery_soc * 0.1, 0.5)
+            if net_demand > discharge:
+                hydro_out = min(hydro_soc * 0.15, net_demand - discharge)
+            grid_out = max(0.0, g + discharge + hydro_out - d)
+        elif p < 3000:
+            charge = min((100 - battery_soc) * 0.1, 0.5)
+            if g - d > 0:
+                charge = min(g - d, charge)
+        elif net_demand > 0:
+            storage_used = min(battery_soc * 0.1 + hydro_soc * 0.15, net_demand * 0.5)
+            discharge = min(battery_soc * 0.1, storage_used * 0.6)
+            hydro_out = min(hydro_soc * 0.15, storage_used * 0.4)
+            grid_in = max(0.0, net_demand - discharge - hydro_out)
+        else:
+            charge = min((100 - battery_soc) * 0.1, -net_demand * 0.7)
+            grid_out = -net_demand - charge
+
+        battery_soc = battery_soc + charge - discharge
+        hydro_soc = hydro_soc - hydro_out
+        out[:, t] = (charge, discharge, hydro_out, grid_in, grid_out, battery_soc, hydro_soc)
+
+    return dict(zip(DECISIONS, out))
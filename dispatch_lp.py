@@ -0,0 +1,159 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+# Decision variables per hour, stored as contiguous blocks of length T
+VARIABLES = ['battery_charge', 'battery_discharge', 'hydro_charge', 'hydro_discharge',
+             'grid_import', 'grid_export', 'curtailment', 'unserved', 'reserve_shortfall',
+             'soc_battery', 'soc_hydro']
+_VAR = {name: k for k, name in enumerate(VARIABLES)}
+
+class StorageDispatchLP:
+    """Multi-period battery + pumped-hydro dispatch formulated as one sparse LP.
+
+    Energy quantities are GWh per hour (= GW). State of charge carries across
+    hours, charging losses use the round-trip efficiencies, and an upward
+    reserve of `reserve_requirement` x demand must be available from storage
+    and grid headroom. Solved with HiGHS through scipy.optimize.linprog.
+    """
+
+    def __init__(self, battery_capacity=1, hydro_capacity=2, battery_power=0.5, hydro_power=0.5,
+                 efficiency_battery=0.88, efficiency_hydro=0.80, reserve_requirement=0.05,
+                 grid_limit=12, import_markup=1.1, soc_min=0.1, soc_max=0.9,
+                 unserved_penalty=50000, reserve_penalty=10000, cycling_cost=1.0):
+        self.battery_capacity = battery_capacity
+        self.hydro_capacity = hydro_capacity
+        self.battery_power = battery_power
+        self.hydro_power = hydro_power
+        self.efficiency_battery = efficiency_battery
+        self.efficiency_hydro = efficiency_hydro
+        self.reserve_requirement = reserve_requirement
+        self.grid_limit = grid_limit
+        self.import_markup = import_markup
+        self.soc_min = soc_min
+        self.soc_max = soc_max
+        self.unserved_penalty = unserved_penalty
+        self.reserve_penalty = reserve_penalty
+        self.cycling_cost = cycling_cost
+        self._structures = {}
+
+    def _structure(self, n_hours):
+        """Constraint matrices and bounds for an n-hour window.
+
+        They only depend on the window length, so they are built once and
+        reused for every window; only costs and right-hand sides change.
+        """
+        if n_hours in self._structures:
+            return self._structures[n_hours]
+
+        T = n_hours
+        eye = sp.identity(T, format='csr')
+        lag = sp.eye(T, k=-1, format='csr')  # picks soc[t-1]
+        zero = sp.csr_matrix((T, T))
+
+        def row(**blocks):
+            return sp.hstack([blocks.get(name, zero) for name in VARIABLES])
+
+        # Power balance: discharge + import + unserved - charge - export - curtailment = demand - generation
+        balance = row(battery_discharge=eye, hydro_discharge=eye, grid_import=eye, unserved=eye,
+                      battery_charge=-eye, hydro_charge=-eye, grid_export=-eye, curtailment=-eye)
+        # SoC dynamics: soc[t] - soc[t-1] - eff * charge[t] + discharge[t] = 0 (soc[-1] moves to the RHS)
+        battery = row(soc_battery=eye - lag, battery_charge=-self.efficiency_battery * eye, battery_discharge=eye)
+        hydro = row(soc_hydro=eye - lag, hydro_charge=-self.efficiency_hydro * eye, hydro_discharge=eye)
+        A_eq = sp.vstack([balance, battery, hydro], format='csc')
+
+        # Upward reserve: import + discharge - shortfall <= grid_limit + storage power - reserve * demand
+        A_ub = row(grid_import=eye, battery_discharge=eye, hydro_discharge=eye, reserve_shortfall=-eye).tocsc()
+
+        upper = {
+            'battery_charge': self.battery_power, 'battery_discharge': self.battery_power,
+            'hydro_charge': self.hydro_power, 'hydro_discharge': self.hydro_power,
+            'grid_import': self.grid_limit, 'grid_export': self.grid_limit,
+            'soc_battery': self.soc_max * self.battery_capacity,
+            'soc_hydro': self.soc_max * self.hydro_capacity
+        }
+        lower = {
+            'soc_battery': self.soc_min * self.battery_capacity,
+            'soc_hydro': self.soc_min * self.hydro_capacity
+        }
+        bounds = np.empty((len(VARIABLES) * T, 2))
+        for name, k in _VAR.items():
+            bounds[k * T:(k + 1) * T, 0] = lower.get(name, 0.0)
+            bounds[k * T:(k + 1) * T, 1] = upper.get(name, np.inf)
+
+        self._structures[n_hours] = (A_eq, A_ub, bounds)
+        return self._structures[n_hours]
+
+    def solve(self, generation, demand, price, battery_soc=0.5, hydro_soc=1.2, hold_terminal_soc=True):
+        """Optimal dispatch over the whole horizon.
+
+        `battery_soc`/`hydro_soc` are the initial stored energy in GWh. With
+        `hold_terminal_soc` the horizon must end with at least that much
+        stored, so the optimizer cannot simply drain storage at the end.
+        Returns a dict of per-hour arrays keyed by VARIABLES.
+        """
+        generation = np.asarray(generation, dtype=float)
+        demand = np.asarray(demand, dtype=float)
+        price = np.asarray(price, dtype=float)
+        T = len(demand)
+        A_eq, A_ub, bounds = self._structure(T)
+
+        cost = np.zeros(len(VARIABLES) * T)
+        def block(name):
+            return slice(_VAR[name] * T, (_VAR[name] + 1) * T)
+        cost[block('grid_import')] = self.import_markup * price
+        cost[block('grid_export')] = -price
+        cost[block('unserved')] = self.unserved_penalty
+        cost[block('reserve_shortfall')] = self.reserve_penalty
+        for name in ('battery_charge', 'battery_discharge', 'hydro_charge', 'hydro_discharge'):
+            cost[block(name)] = self.cycling_cost
+
+        b_eq = np.zeros(3 * T)
+        b_eq[:T] = demand - generation
+        b_eq[T] = battery_soc
+        b_eq[2 * T] = hydro_soc
+        b_ub = self.grid_limit + self.battery_power + self.hydro_power - self.reserve_requirement * demand
+
+        if hold_terminal_soc:
+            bounds = bounds.copy()
+            for name, soc in (('soc_battery', battery_soc), ('soc_hydro', hydro_soc)):
+                end = (_VAR[name] + 1) * T - 1
+                bounds[end, 0] = min(max(bounds[end, 0], soc), bounds[end, 1])
+
+        result = linprog(cost, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
+        if result.status != 0:
+            raise RuntimeError(f"Dispatch LP failed: {result.message}")
+
+        # Clip solver round-off (e.g. -1e-12) back inside the variable bounds
+        x = np.clip(result.x, bounds[:, 0], bounds[:, 1])
+        return {name: x[block(name)] for name in VARIABLES}
+
+    def solve_receding(self, generation, demand, price, horizon=24, step=1,
+                       battery_soc=0.5, hydro_soc=1.2):
+        """Receding-horizon (MPC) dispatch.
+
+        Each window of `horizon` hours is solved, its first `step` hours are
+        committed, and the next window starts from the committed end-of-step
+        state of charge. That carry-over is the only state shared between
+        windows: scipy's linprog gives HiGHS no initial basis, so every window
+        is solved cold (reusing only the cached constraint matrices). With
+        step=1 that is one solve per hour; a larger `step` trades plan
+        freshness for proportionally fewer solves.
+        """
+        generation = np.asarray(generation, dtype=float)
+        demand = np.asarray(demand, dtype=float)
+        price = np.asarray(price, dtype=float)
+        T = len(demand)
+        decisions = {name: np.empty(T) for name in VARIABLES}
+
+        for start in range(0, T, step):
+            window = slice(start, min(start + horizon, T))
+            solution = self.solve(generation[window], demand[window], price[window],
+                                  battery_soc, hydro_soc, hold_terminal_soc=False)
+            n_commit = min(step, T - start)
+            for name in VARIABLES:
+                decisions[name][start:start + n_commit] = solution[name][:n_commit]
+            battery_soc = solution['soc_battery'][n_commit - 1]
+            hydro_soc = solution['soc_hydro'][n_commit - 1]
+
+        return decisions
@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+from dispatch_lp import StorageDispatchLP
+from dispatch_kernel import rule_based_dispatch
+
+class DispatchPlanner:
+    """Dispatch policies and economics shared by the RenewableEnergyOptimizer variants.
+
+    Expects the storage and grid system parameters (battery_capacity,
+    hydro_capacity, battery_power, ..., grid_capacity) as attributes. The
+    reliability score of an hour is
+    min(reliability_cap, reliability_base + reserve_margin * reliability_slope);
+    optimizers override these constants to change the scoring.
+    """
+
+    reliability_base = 0.85
+    reliability_slope = 0.1
+    reliability_cap = 0.99
+
+    def optimize_dispatch(self, forecasts_df, optimization_horizon=24, method='rule', carry_soc=False, step=1):
+        """Optimize energy dispatch using MPC approach.
+
+        method='lp' solves the horizon as a linear program with SoC continuity,
+        re-solving every `step` hours (see optimize_dispatch_lp); 'rule' applies
+        the price rules of _optimize_single_hour through the vectorized
+        dispatch kernel.
+        """
+        if method == 'lp':
+            return self.optimize_dispatch_lp(forecasts_df, optimization_horizon, step)
+
+        print("Running optimization...")
+        hourly = self._aggregate_hourly(forecasts_df)
+
+        # Rule-based policy over all hours at once; each hour starts from 50%/60% SoC
+        # unless carry_soc threads the state of charge from hour to hour
+        decisions = rule_based_dispatch(
+            hourly['total_generation'].values, hourly['total_demand'].values, hourly['price'].values,
+            battery_soc=50, hydro_soc=60, carry_soc=carry_soc
+        )
+        return self._dispatch_frame(hourly, decisions)
+
+    def _dispatch_lp(self):
+        """LP dispatch model built from the system parameters (cached)"""
+        if getattr(self, '_lp', None) is None:
+            self._lp = StorageDispatchLP(
+                battery_capacity=self.battery_capacity, hydro_capacity=self.hydro_capacity,
+                battery_power=self.battery_power, hydro_power=self.hydro_power,
+                efficiency_battery=self.efficiency_battery, efficiency_hydro=self.efficiency_hydro,
+                reserve_requirement=self.reserve_requirement, grid_limit=self.grid_capacity
+            )
+        return self._lp
+
+    def optimize_dispatch_lp(self, forecasts_df, optimization_horizon=None, step=1):
+        """Optimize dispatch as one sparse LP with battery/hydro SoC carried across hours.
+
+        With `optimization_horizon` shorter than the forecast period, runs in
+        receding-horizon mode: solve `optimization_horizon` hours, commit
+        `step` hours, and start the next window from the committed SoC. Each
+        window is a cold HiGHS solve (see StorageDispatchLP.solve_receding), so
+        the cost scales with the number of windows; a larger `step` re-solves
+        less often.
+        """
+        print("Running LP optimization...")
+        hourly = self._aggregate_hourly(forecasts_df)
+        lp = self._dispatch_lp()
+
+        # Same starting state as the rule-based policy: battery 50%, hydro 60%
+        battery_soc = 0.5 * self.battery_capacity
+        hydro_soc = 0.6 * self.hydro_capacity
+        args = (hourly['total_generation'].values, hourly['total_demand'].values, hourly['price'].values)
+
+        if optimization_horizon is None or optimization_horizon >= len(hourly):
+            decisions = lp.solve(*args, battery_soc=battery_soc, hydro_soc=hydro_soc)
+        else:
+            decisions = lp.solve_receding(*args, horizon=optimization_horizon, step=step,
+                                          battery_soc=battery_soc, hydro_soc=hydro_soc)
+
+        decisions['final_soc_battery'] = 100 * decisions.pop('soc_battery') / self.battery_capacity
+        decisions['final_soc_hydro'] = 100 * decisions.pop('soc_hydro') / self.hydro_capacity
+        return self._dispatch_frame(hourly, decisions)
+
+    def _aggregate_hourly(self, forecasts_df):
+        """Aggregate regional forecasts into one system-wide row per timestamp"""
+        df = forecasts_df.sort_values('timestamp', kind='stable')
+        timestamps = df['timestamp'].values
+        starts = np.flatnonzero(np.r_[True, timestamps[1:] != timestamps[:-1]])
+        counts = np.diff(np.r_[starts, len(timestamps)])
+
+        if (counts == counts[0]).all():
+            # Regular timestamp x region grid: row sums over a (T, R) view
+            def group_sum(column):
+                return df[column].values.reshape(len(starts), counts[0]).sum(axis=1)
+        else:
+            def group_sum(column):
+                return np.array([part.sum() for part in np.split(df[column].values, starts[1:])])
+
+        return pd.DataFrame({
+            'timestamp': timestamps[starts],
+            'total_generation': group_sum('generation_forecast'),
+            'total_demand': group_sum('demand_forecast'),
+            'price': group_sum('price_forecast') / counts
+        })
+
+    def _dispatch_frame(self, hourly, decisions):
+        """Dispatch results table with economics and reliability, from per-hour decision arrays"""
+        results_df = hourly[['timestamp', 'total_generation', 'total_demand']].copy()
+        results_df['net_demand'] = results_df['total_demand'] - results_df['total_generation']
+        results_df['price'] = hourly['price'].values
+        for name in ('battery_charge', 'battery_discharge', 'hydro_charge', 'hydro_discharge',
+                     'grid_import', 'grid_export', 'final_soc_battery', 'final_soc_hydro'):
+            if name in decisions:
+                results_df[name] = decisions[name]
+
+        revenue, costs, reliability = self.dispatch_economics(
+            results_df['total_generation'].values, results_df['total_demand'].values,
+            results_df['price'].values, decisions)
+        results_df['revenue'] = revenue
+        results_df['costs'] = costs
+        results_df['reliability_score'] = reliability
+
+        return results_df
+
+    def dispatch_economics(self, generation, demand, price, decisions):
+        """Revenue, costs and reliability score for dispatch decision arrays of any shape"""
+        revenue = decisions['grid_export'] * price
+        costs = decisions['grid_import'] * price * 1.1
+
+        total_supply = generation + decisions['battery_discharge'] + decisions['hydro_discharge'] + decisions['grid_import']
+        reserve_margin = np.divide(total_supply - demand, demand, out=np.zeros(np.shape(demand)), where=demand > 0)
+        reliability = np.minimum(self.reliability_cap, self.reliability_base + reserve_margin * self.reliability_slope)
+
+        return revenue, costs, reliability
+
+    def _optimize_single_hour(self, generation, demand, price, battery_soc, hydro_soc, timestamp):
+        """Optimize dispatch for a single hour (scalar reference for dispatch_kernel)"""
+        # Calculate net demand
+        net_demand = demand - generation
+
+        # Initialize decision variables
+        dispatch_decisions = {
+            'timestamp': timestamp,
+            'total_generation': generation,
+            'total_demand': demand,
+            'net_demand': net_demand,
+            'price': price,
+            'battery_charge': 0,
+            'battery_discharge': 0,
+            'hydro_discharge': 0,
+            'grid_import': 0,
+            'grid_export': 0,
+            'final_soc_battery': battery_soc,
+            'final_soc_hydro': hydro_soc,
+            'revenue': 0,
+            'costs': 0,
+            'reliability_score': 0.94
+        }
+
+        # Price-based storage strategy
+        if price > 4500:  # High price - discharge storage
+            max_discharge_battery = min(battery_soc * 0.1, 0.5)
+            max_discharge_hydro = 0
+            dispatch_decisions['battery_discharge'] = max_discharge_battery
+
+            if net_demand > max_discharge_battery:
+                max_discharge_hydro = min(hydro_soc * 0.15, net_demand - max_discharge_battery)
+                dispatch_decisions['hydro_discharge'] = max_discharge_hydro
+
+            excess = generation + max_discharge_battery + max_discharge_hydro - demand
+            if excess > 0:
+                dispatch_decisions['grid_export'] = excess
+
+        elif price < 3000:  # Low price - charge storage
+            max_charge_battery = min((100 - battery_soc) * 0.1, 0.5)
+            dispatch_decisions['battery_charge'] = max_charge_battery
+
+            excess = generation - demand
+            if excess > 0:
+                actual_charge = min(excess, max_charge_battery)
+                dispatch_decisions['battery_charge'] = actual_charge
+
+        else:  # Normal price - balance supply and demand
+            if net_demand > 0:  # Deficit
+                storage_available = battery_soc * 0.1 + hydro_soc * 0.15
+                storage_used = min(storage_available, net_demand * 0.5)
+
+                dispatch_decisions['battery_discharge'] = min(battery_soc * 0.1, storage_used * 0.6)
+                dispatch_decisions['hydro_discharge'] = min(hydro_soc * 0.15, storage_used * 0.4)
+
+                remaining_deficit = net_demand - dispatch_decisions['battery_discharge'] - dispatch_decisions['hydro_discharge']
+                dispatch_decisions['grid_import'] = max(0, remaining_deficit)
+
+            else:  # Surplus
+                surplus = -net_demand
+                max_charge = min((100 - battery_soc) * 0.1, surplus * 0.7)
+                dispatch_decisions['battery_charge'] = max_charge
+                dispatch_decisions['grid_export'] = surplus - max_charge
+
+        # Update SoC
+        dispatch_decisions['final_soc_battery'] = battery_soc + dispatch_decisions['battery_charge'] - dispatch_decisions['battery_discharge']
+        dispatch_decisions['final_soc_hydro'] = hydro_soc - dispatch_decisions['hydro_discharge']
+
+        # Calculate economics
+        dispatch_decisions['revenue'] = dispatch_decisions['grid_export'] * price
+        dispatch_decisions['costs'] = dispatch_decisions['grid_import'] * price * 1.1
+
+        # Calculate reliability
+        total_supply = (generation + dispatch_decisions['battery_discharge'] +
+                       dispatch_decisions['hydro_discharge'] + dispatch_decisions['grid_import'])
+        reserve_margin = (total_supply - demand) / demand if demand > 0 else 0
+        dispatch_decisions['reliability_score'] = min(self.reliability_cap,
+                                                      self.reliability_base + reserve_margin * self.reliability_slope)
+
+        return dispatch_decisions
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import xgboost as xgb
+import dataset_store
+from forecast_features import GENERATION_FEATURES
+
+# Booster settings matching the in-memory XGBRegressor(n_estimators=100, max_depth=6, learning_rate=0.1)
+BOOSTER_PARAMS = {
+    'objective': 'reg:squarederror',
+    'tree_method': 'hist',
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'seed': 42
+}
+NUM_BOOST_ROUND = 100
+
+# Raw store columns the generation features are derived from (timestamp and region are implicit)
+STORE_COLUMNS = ['generation', 'temperature', 'wind_speed', 'solar_irradiance', 'humidity']
+
+def generation_features(batch, region_encoder):
+    """(X, y) float64 arrays of GENERATION_FEATURES for one store batch"""
+    batch = batch.dropna(subset=STORE_COLUMNS)
+    timestamps = batch['timestamp'].dt
+    regions = batch['region'].astype('category')
+    # Encode each batch's few distinct regions once, then index by category code
+    region_codes = region_encoder.transform(regions.cat.categories.astype(str))[regions.cat.codes.values]
+
+    columns = {
+        'hour': timestamps.hour.values,
+        'month': timestamps.month.values,
+        'weekday': timestamps.weekday.values,
+        'temperature': batch['temperature'].values,
+        'wind_speed': batch['wind_speed'].values,
+        'solar_irradiance': batch['solar_irradiance'].values,
+        'humidity': batch['humidity'].values,
+        'region_encoded': region_codes
+    }
+    X = np.column_stack([columns[name] for name in GENERATION_FEATURES]).astype(np.float64)
+    return X, batch['generation'].values.astype(np.float64)
+
+def time_filter(start=None, end=None):
+    """Arrow filter expression for start <= timestamp < end"""
+    expression = None
+    for bound, op in ((start, 'ge'), (end, 'lt')):
+        if bound is None:
+            continue
+        scalar = pa.scalar(pd.Timestamp(bound), type=pa.timestamp('ns'))
+        condition = ds.field('timestamp') >= scalar if op == 'ge' else ds.field('timestamp') < scalar
+        expression = condition if expression is None else expression & condition
+    return expression
+
+class StoreDataIter(xgb.DataIter):
+    """Feeds XGBoost scaled generation features from the dataset store, one batch at a time.
+
+    XGBoost calls next() repeatedly and reset() between passes; each pass
+    re-scans the Parquet store, so only one batch is ever held in memory.
+    """
+
+    def __init__(self, store_path, region_encoder, scaler, filter=None, batch_rows=1 << 20, cache_prefix=None):
+        super().__init__(cache_prefix=cache_prefix)
+        self.store_path = store_path
+        self.region_encoder = region_encoder
+        self.scaler = scaler
+        self.filter = filter
+        self.batch_rows = batch_rows
+        self._batches = None
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = dataset_store.iter_batches(self.store_path, STORE_COLUMNS, self.filter, self.batch_rows)
+        for batch in self._batches:
+            X, y = generation_features(batch, self.region_encoder)
+            if len(y):
+                input_data(data=self.scaler.transform(X), label=y)
+                return 1
+        return 0
+
+    def reset(self):
+        self._batches = None
+
+def fit_scaler(store_path, region_encoder, scaler, filter=None, batch_rows=1 << 20):
+    """First pass: StandardScaler.partial_fit over the training rows; returns the row count"""
+    n_rows = 0
+    for batch in dataset_store.iter_batches(store_path, STORE_COLUMNS, filter, batch_rows):
+        X, _ = generation_features(batch, region_encoder)
+        if len(X):
+            scaler.partial_fit(X)
+            n_rows += len(X)
+    return n_rows
+
+def evaluate(booster, store_path, region_encoder, scaler, filter=None, batch_rows=1 << 20):
+    """Streaming MAPE and RMSE of `booster` over the rows matching `filter`"""
+    eps = np.finfo(np.float64).eps
+    abs_pct_sum = sq_sum = 0.0
+    n_rows = 0
+    for batch in dataset_store.iter_batches(store_path, STORE_COLUMNS, filter, batch_rows):
+        X, y = generation_features(batch, region_encoder)
+        if not len(y):
+            continue
+        pred = booster.inplace_predict(scaler.transform(X))
+        # Same definition as sklearn's mean_absolute_percentage_error
+        abs_pct_sum += float(np.sum(np.abs(y - pred) / np.maximum(np.abs(y), eps)))
+        sq_sum += float(np.sum((y - pred) ** 2))
+        n_rows += len(y)
+    if n_rows == 0:
+        return float('nan'), float('nan'), 0
+    return abs_pct_sum / n_rows, np.sqrt(sq_sum / n_rows), n_rows
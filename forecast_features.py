@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# Feature columns the generation model is trained on
+GENERATION_FEATURES = ['hour', 'month', 'weekday', 'temperature', 'wind_speed',
+                       'solar_irradiance', 'humidity', 'region_encoded']
+
+def build_forecast_features(start_date, end_date, regions, region_encoder=None, rng=None, freq='h'):
+    """Build the forecast feature table for every timestamp x region.
+
+    Rows are ordered timestamp-major with regions in the given order, exactly
+    like the nested timestamp/region loop this replaces. Weather inputs are
+    drawn for the whole (T, R) grid at once from `rng`.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    timestamps = pd.date_range(start_date, end_date, freq=freq)
+    regions = np.asarray(regions, dtype=object)
+    n_times, n_regions = len(timestamps), len(regions)
+    weather = draw_weather(timestamps, n_regions, rng)
+
+    features_df = pd.DataFrame({
+        'timestamp': np.repeat(timestamps.values, n_regions),
+        'region': np.tile(regions, n_times),
+        'hour': np.repeat(timestamps.hour.values, n_regions),
+        'month': np.repeat(timestamps.month.values, n_regions),
+        'weekday': np.repeat(timestamps.weekday.values, n_regions),
+        **{name: values.ravel() for name, values in weather.items()}
+    })
+
+    if region_encoder is not None:
+        # Encode the R distinct regions once and tile, instead of per row
+        features_df['region_encoded'] = np.tile(region_encoder.transform(regions), n_times)
+
+    return features_df
+
+def build_row_features(rows, region_encoder=None, rng=None):
+    """Build the forecast feature table for explicit (timestamp, region) rows.
+
+    `rows` is a DataFrame or list of dicts with timestamp and region and,
+    optionally, the weather columns. Supplied weather values are used as
+    given; missing columns or values are drawn like build_forecast_features.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    rows = pd.DataFrame(rows)
+    missing = {'timestamp', 'region'} - set(rows.columns)
+    if missing:
+        raise ValueError(f"Forecast rows need {sorted(missing)}")
+
+    # Zone-aware timestamps are converted to UTC; naive ones are taken as UTC already
+    timestamps = pd.DatetimeIndex(pd.to_datetime(rows['timestamp'], format='mixed', utc=True)).tz_convert(None)
+    regions = rows['region'].astype(str).values.astype(object)
+    weather = draw_weather(timestamps, 1, rng)
+
+    features_df = pd.DataFrame({
+        'timestamp': timestamps.values,
+        'region': regions,
+        'hour': timestamps.hour.values,
+        'month': timestamps.month.values,
+        'weekday': timestamps.weekday.values
+    })
+    for name, drawn in weather.items():
+        given = pd.to_numeric(rows[name], errors='coerce').values if name in rows else np.full(len(rows), np.nan)
+        features_df[name] = np.where(np.isnan(given), drawn.ravel(), given)
+
+    if region_encoder is not None:
+        # Encode each distinct region once
+        unique, codes = np.unique(regions.astype(str), return_inverse=True)
+        unknown = np.setdiff1d(unique, region_encoder.classes_.astype(str))
+        if len(unknown):
+            raise ValueError(f"Unknown regions {unknown.tolist()}; the model knows {region_encoder.classes_.tolist()}")
+        features_df['region_encoded'] = region_encoder.transform(unique)[codes]
+
+    return features_df
+
+def draw_weather(timestamps, n_regions, rng, n_scenarios=None):
+    """Forecast weather inputs for a timestamp x region grid.
+
+    Returns temperature, wind_speed, solar_irradiance and humidity arrays of
+    shape (T, R), or (S, T, R) when `n_scenarios` is given.
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    shape = (len(timestamps), n_regions) if n_scenarios is None else (n_scenarios, len(timestamps), n_regions)
+
+    # Time features, shape (T, 1); they broadcast over regions and scenarios
+    hour = timestamps.hour.values[:, None]
+    annual_wave = np.sin(2 * np.pi * timestamps.dayofyear.values[:, None] / 365)
+
+    return {
+        'temperature': 25 + 10 * annual_wave + rng.normal(0, 3, shape),
+        'wind_speed': np.maximum(0, 5 + 3 * np.sin(2 * np.pi * hour / 24) + rng.normal(0, 1.5, shape)),
+        'solar_irradiance': np.maximum(0, 600 * np.maximum(0, np.sin(np.pi * hour / 12)) + rng.normal(0, 50, shape)),
+        'humidity': 60 + 20 * annual_wave + rng.normal(0, 5, shape)
+    }
+
+def baseline_demand(hours, rng=None, phase=0, noise=0.5, floor=None):
+    """Sinusoidal daily demand pattern (GW) used when no demand model is trained"""
+    rng = rng if rng is not None else np.random.default_rng()
+    hours = np.asarray(hours)
+    demand = 8 + 4 * np.sin(2 * np.pi * (hours - phase) / 24) + rng.normal(0, noise, hours.shape)
+    return demand if floor is None else np.maximum(floor, demand)
+
+def baseline_price(hours, rng=None, period=12, noise=200, floor=2000):
+    """Peak-hour price pattern (Rs/MWh) used when no price model is trained"""
+    rng = rng if rng is not None else np.random.default_rng()
+    hours = np.asarray(hours)
+    price = 3500 + 1000 * np.sin(2 * np.pi * (hours - 6) / period) + rng.normal(0, noise, hours.shape)
+    return np.maximum(floor, price)
@@ -0,0 +1,192 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Job lifecycle states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+ACTIVE_STATES = (QUEUED, RUNNING)
+# Bound parameter list for `status IN (...)` over ACTIVE_STATES
+ACTIVE_PLACEHOLDERS = ', '.join('?' * len(ACTIVE_STATES))
+
+# Owners refresh their active jobs' heartbeat this often (seconds); an active job
+# whose heartbeat is older than HEARTBEAT_TIMEOUT has lost its owner
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TIMEOUT = 60
+
+class QueueFullError(Exception):
+    """Raised when the worker pool already has max_pending jobs queued or running"""
+
+class JobStore:
+    """SQLite job table shared by every server process on the host.
+
+    Each call opens its own short-lived connection, so the store is safe to
+    use from request threads and pool threads alike. WAL mode lets status
+    polls read while a worker writes a result. Every job records the id of
+    the JobManager that owns it and a heartbeat timestamp the owner keeps
+    refreshing; process ids are not used, since they repeat across restarts.
+    """
+
+    def __init__(self, db_path='jobs.db'):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    owner_id TEXT,
+                    heartbeat_at REAL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )''')
+            # Tables created before heartbeats were tracked
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for name, kind in (('owner_id', 'TEXT'), ('heartbeat_at', 'REAL')):
+                if name not in columns:
+                    conn.execute(f'ALTER TABLE jobs ADD COLUMN {name} {kind}')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, kind, params, owner_id):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT INTO jobs (id, kind, status, params, owner_id, heartbeat_at, created_at) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (job_id, kind, QUEUED, json.dumps(params), owner_id, now, now))
+        return job_id
+
+    def update(self, job_id, **fields):
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        with self._connect() as conn:
+            conn.execute(f'UPDATE jobs SET {columns} WHERE id = ?', (*fields.values(), job_id))
+
+    def get(self, job_id):
+        """Job row as a dict with params/result decoded, or None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def heartbeat(self, owner_id):
+        """Refresh the heartbeat of every active job owned by `owner_id`"""
+        with self._connect() as conn:
+            conn.execute(f'UPDATE jobs SET heartbeat_at = ? WHERE owner_id = ? AND status IN ({ACTIVE_PLACEHOLDERS})',
+                         (time.time(), owner_id, *ACTIVE_STATES))
+
+    def fail_orphans(self, timeout=HEARTBEAT_TIMEOUT):
+        """Mark active jobs whose owner stopped sending heartbeats (restart, crash) as failed"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f'UPDATE jobs SET status = ?, error = ?, finished_at = ? '
+                f'WHERE status IN ({ACTIVE_PLACEHOLDERS}) AND COALESCE(heartbeat_at, created_at) < ?',
+                (FAILED, 'Interrupted by server restart', now, *ACTIVE_STATES, now - timeout))
+        return cursor.rowcount
+
+    def purge(self, max_age):
+        """Delete finished jobs older than max_age seconds"""
+        with self._connect() as conn:
+            conn.execute(f'DELETE FROM jobs WHERE status NOT IN ({ACTIVE_PLACEHOLDERS}) AND finished_at < ?',
+                         (*ACTIVE_STATES, time.time() - max_age))
+
+class JobManager:
+    """Runs long optimization requests on a bounded background thread pool.
+
+    Submissions return a job id immediately; status and results are kept in
+    the JobStore, so any server process can answer a poll. At most
+    `max_pending` jobs are queued or running per process, beyond that
+    submit() raises QueueFullError instead of growing an unbounded backlog.
+
+    A background thread refreshes the heartbeat of this manager's jobs every
+    `heartbeat_interval` seconds and fails any job, from any process, whose
+    heartbeat is older than `heartbeat_timeout`.
+    """
+
+    def __init__(self, handlers, db_path='jobs.db', max_workers=2, max_pending=16, result_ttl=24 * 3600,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.handlers = handlers
+        self.store = JobStore(db_path)
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.owner_id = uuid.uuid4().hex
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self):
+        while True:
+            try:
+                self.store.heartbeat(self.owner_id)
+                orphans = self.store.fail_orphans(self.heartbeat_timeout)
+                if orphans:
+                    print(f"Marked {orphans} interrupted jobs as failed")
+            except sqlite3.Error as e:
+                print(f"Job heartbeat failed: {e}")
+            if self._stopped.wait(self.heartbeat_interval):
+                return
+
+    def submit(self, kind, params):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job type: {kind}")
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending)")
+            self._pending += 1
+
+        self.store.purge(self.result_ttl)
+        job_id = self.store.create(kind, params, self.owner_id)
+        self._executor.submit(self._run, job_id, kind, params)
+        return job_id
+
+    def _run(self, job_id, kind, params):
+        self.store.update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = self.handlers[kind](params)
+            self.store.update(job_id, status=SUCCEEDED, result=json.dumps(result), finished_at=time.time())
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def status(self, job_id):
+        """Job metadata without the result payload, or None for an unknown id"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        job.pop('result')
+        job.pop('owner_id')
+        job.pop('owner_pid', None)
+        return job
+
+    def result(self, job_id):
+        return self.store.get(job_id)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+        self._stopped.set()
@@ -0,0 +1,134 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'stage_duration_seconds': 'Wall time of each optimization pipeline stage',
+    'http_request_duration_seconds': 'Wall time of API requests',
+    'http_requests_total': 'API requests by endpoint and status',
+    'result_cache_requests_total': 'Seeded optimization requests by result cache outcome'
+}
+
+# Spans recorded during the current request, for the Server-Timing header
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+class Histogram:
+    """Cumulative-bucket latency histogram for one label set"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Process-local counters and histograms, rendered in Prometheus text format.
+
+    Recording is a dict lookup and a few additions under one lock, cheap
+    enough to leave on around every stage of every request. Each gunicorn
+    worker keeps its own registry, so scrape per worker or aggregate by
+    instance label.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines += _header(name, 'counter')
+                for (metric, labels), value in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_labels(labels)} {value}')
+
+            for name in sorted({name for name, _ in self.histograms}):
+                lines += _header(name, 'histogram')
+                for (metric, labels), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {histogram.sum}')
+                    lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+def _header(name, kind):
+    lines = [f'# HELP {name} {HELP[name]}'] if name in HELP else []
+    return lines + [f'# TYPE {name} {kind}']
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+METRICS = MetricsRegistry()
+
+def increment(name, amount=1, **labels):
+    METRICS.increment(name, amount, **labels)
+
+def observe(name, value, **labels):
+    METRICS.observe(name, value, **labels)
+
+@contextmanager
+def span(stage):
+    """Time a pipeline stage into stage_duration_seconds and the current request's Server-Timing"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        METRICS.observe('stage_duration_seconds', elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+def begin_request():
+    """Start collecting spans for the current request"""
+    _request_spans.set([])
+
+def request_spans():
+    return _request_spans.get() or []
+
+def server_timing(spans, total=None):
+    """Server-Timing header value; repeated stages are summed, durations in milliseconds"""
+    durations = {}
+    for stage, elapsed in spans:
+        durations[stage] = durations.get(stage, 0.0) + elapsed
+    if total is not None:
+        durations['total'] = total
+    return ', '.join(f'{stage};dur={elapsed * 1000:.2f}' for stage, elapsed in durations.items())
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+import numpy as np
+import xgboost as xgb
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from profile_model import HourlyProfileModel
+from tree_compiler import CompiledTreeModel
+
+BUNDLE_FILE = 'model_bundle.bin'
+MAGIC = b'GZMBNDL1'
+FORMAT_VERSION = 1
+# Blob offsets are multiples of this, so mapped arrays are cache-line and SIMD aligned
+ALIGNMENT = 64
+
+# Estimators rebuilt from their fitted attributes; nothing in a bundle is unpickled
+ESTIMATOR_TYPES = {'StandardScaler': StandardScaler, 'LabelEncoder': LabelEncoder}
+
+class BundleError(ValueError):
+    pass
+
+class BundleWriter:
+    """Collects named binary blobs and writes them as one aligned bundle file.
+
+    Layout: MAGIC, little-endian u64 manifest length, the JSON manifest,
+    then every blob at an ALIGNMENT-aligned offset. The manifest records each
+    blob's offset, size, dtype, shape and SHA-256, plus the structure needed
+    to rebuild the models around them.
+    """
+
+    def __init__(self):
+        self.blobs = {}
+        self.arrays = {}
+
+    def add_array(self, name, array):
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise BundleError(f"Cannot store object array {name} in a bundle")
+        self.arrays[name] = {'dtype': array.dtype.str, 'shape': list(array.shape)}
+        self.blobs[name] = array.tobytes()
+        return name
+
+    def add_bytes(self, name, data):
+        self.blobs[name] = bytes(data)
+        return name
+
+    def write(self, path, structure):
+        """Write atomically; returns the bundle version (hash of the blob checksums and structure)"""
+        entries = {}
+        for name, data in self.blobs.items():
+            entries[name] = {'nbytes': len(data), 'sha256': hashlib.sha256(data).hexdigest(), **self.arrays.get(name, {})}
+        version = hashlib.sha256(json.dumps([entries, structure], sort_keys=True).encode()).hexdigest()[:12]
+
+        # Offsets depend on the manifest length, which depends on the offsets; fix them relative to the data start
+        offset = 0
+        for name in sorted(entries):
+            entries[name]['offset'] = offset
+            offset = _align(offset + entries[name]['nbytes'])
+
+        manifest = {'format': FORMAT_VERSION, 'version': version, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'blobs': entries, 'structure': structure}
+        header = json.dumps(manifest, sort_keys=True).encode()
+        data_start = _align(len(MAGIC) + 8 + len(header))
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+            for name in sorted(entries):
+                f.seek(data_start + entries[name]['offset'])
+                f.write(self.blobs[name])
+            f.truncate(data_start + offset)
+        # Replace, never rewrite in place: workers may still have the previous bundle mapped
+        os.replace(tmp_path, path)
+        return version
+
+class Bundle:
+    """Read-only memory map of a bundle file.
+
+    Arrays are zero-copy views into the map, so every process mapping the
+    same file shares one physical copy through the page cache, including
+    gunicorn workers that each map the bundle after fork.
+    """
+
+    def __init__(self, path, verify=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise BundleError(f"{path} is not a model bundle")
+        (header_length,) = struct.unpack_from('<Q', self._map, len(MAGIC))
+        header_end = len(MAGIC) + 8 + header_length
+        self.manifest = json.loads(self._map[len(MAGIC) + 8:header_end])
+        if self.manifest['format'] != FORMAT_VERSION:
+            raise BundleError(f"Unsupported bundle format {self.manifest['format']}")
+        self._data_start = _align(header_end)
+        if verify:
+            self.verify()
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def structure(self):
+        return self.manifest['structure']
+
+    def _view(self, name):
+        entry = self.manifest['blobs'][name]
+        start = self._data_start + entry['offset']
+        return memoryview(self._map)[start:start + entry['nbytes']]
+
+    def verify(self):
+        """Check every blob against its manifest checksum"""
+        for name, entry in self.manifest['blobs'].items():
+            if hashlib.sha256(self._view(name)).hexdigest() != entry['sha256']:
+                raise BundleError(f"Checksum mismatch for {name} in {self.path}")
+
+    def array(self, name):
+        entry = self.manifest['blobs'][name]
+        return np.frombuffer(self._view(name), dtype=np.dtype(entry['dtype'])).reshape(entry['shape'])
+
+    def bytes(self, name):
+        return self._view(name)
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _save_estimator(writer, prefix, estimator):
+    """Fitted attributes (trailing underscore) as blobs or JSON values"""
+    kind = type(estimator).__name__
+    if kind not in ESTIMATOR_TYPES:
+        raise BundleError(f"Cannot bundle estimator type {kind}")
+    attrs = {}
+    for name, value in vars(estimator).items():
+        if not name.endswith('_') or name.startswith('_'):
+            continue
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            attrs[name] = {'array': writer.add_array(f'{prefix}/{name}', value)}
+        elif isinstance(value, np.ndarray):
+            attrs[name] = {'objects': value.tolist()}
+        else:
+            attrs[name] = {'value': _to_json(value)}
+    return {'type': kind, 'params': {k: _to_json(v) for k, v in estimator.get_params().items()}, 'attrs': attrs}
+
+def _load_estimator(bundle, spec):
+    estimator = ESTIMATOR_TYPES[spec['type']](**spec['params'])
+    for name, attr in spec['attrs'].items():
+        if 'array' in attr:
+            value = bundle.array(attr['array'])
+        elif 'objects' in attr:
+            value = np.array(attr['objects'], dtype=object)
+        else:
+            value = attr['value']
+        setattr(estimator, name, value)
+    return estimator
+
+def write_bundle(path, models, scalers, encoders):
+    """Write the generation booster and its compiled trees, profiles, scalers and encoders to one file"""
+    writer = BundleWriter()
+    structure = {'models': {}, 'scalers': {}, 'encoders': {}}
+
+    if 'generation' in models:
+        booster = models['generation'].get_booster()
+        compiled = models.get('generation_compiled') or \
+            CompiledTreeModel.from_booster(booster, scalers.get('generation'))
+        structure['models']['generation'] = {
+            'booster': writer.add_bytes('generation/booster', booster.save_raw()),
+            'compiled': {name: writer.add_array(f'generation/compiled/{name}', getattr(compiled, name))
+                         for name in CompiledTreeModel.ARRAYS},
+            'max_depth': int(compiled.max_depth),
+            'base_score': float(compiled.base_score)
+        }
+
+    for name in ('demand', 'price'):
+        profile = models.get(name)
+        if isinstance(profile, HourlyProfileModel):
+            structure['models'][name] = {
+                'by_weekday': profile.by_weekday,
+                'by_month': profile.by_month,
+                'arrays': {attr: writer.add_array(f'{name}/{attr}', getattr(profile, attr))
+                           for attr in ('regions', 'sums', 'counts')}
+            }
+
+    for name, scaler in scalers.items():
+        structure['scalers'][name] = _save_estimator(writer, f'scalers/{name}', scaler)
+    for name, encoder in encoders.items():
+        structure['encoders'][name] = _save_estimator(writer, f'encoders/{name}', encoder)
+
+    return writer.write(path, structure)
+
+def read_bundle(path, verify=True):
+    """(version, models, scalers, encoders) backed by a memory map of `path`"""
+    bundle = Bundle(path, verify=verify)
+    structure = bundle.structure
+    models = {}
+
+    generation = structure['models'].get('generation')
+    if generation is not None:
+        # XGBoost copies the booster into private memory in every process. Only the compiled trees
+        # stay mapped, and they serve predictions only when loaded with compile_trees (small batches)
+        models['generation'] = xgb.XGBRegressor()
+        models['generation'].load_model(bytearray(bundle.bytes(generation['booster'])))
+        arrays = [bundle.array(generation['compiled'][name]) for name in CompiledTreeModel.ARRAYS]
+        models['generation_compiled'] = CompiledTreeModel(
+            *arrays, generation['max_depth'], np.float32(generation['base_score']))
+
+    for name in ('demand', 'price'):
+        spec = structure['models'].get(name)
+        if spec is not None:
+            profile = HourlyProfileModel(by_weekday=spec['by_weekday'], by_month=spec['by_month'])
+            for attr, blob in spec['arrays'].items():
+                setattr(profile, attr, bundle.array(blob))
+            models[name] = profile
+
+    scalers = {name: _load_estimator(bundle, spec) for name, spec in structure['scalers'].items()}
+    encoders = {name: _load_estimator(bundle, spec) for name, spec in structure['encoders'].items()}
+    return bundle.version, models, scalers, encoders
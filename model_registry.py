@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from ai_model_trainer_simple import RenewableEnergyAIModel
+from metrics import span
+
+MANIFEST_FILE = 'manifest.json'
+# Required artifacts; demand/price profiles are optional and tracked through the manifest
+ARTIFACT_FILES = ['generation_model.json', 'generation_scaler.pkl', 'region_encoder.pkl']
+
+def file_sha256(path):
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_manifest(path, files):
+    """Write the artifact manifest last and atomically, so readers never see a partial set"""
+    hashes = {name: file_sha256(os.path.join(path, name)) for name in sorted(files)}
+    version = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()[:12]
+    manifest = {'version': version, 'files': hashes, 'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+    tmp_path = os.path.join(path, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, MANIFEST_FILE))
+    return version
+
+class ModelSnapshot:
+    """Immutable set of loaded artifacts tagged with a version id.
+
+    `ai_model` is a RenewableEnergyAIModel holding exactly these artifacts;
+    it must not be retrained in place.
+    """
+
+    def __init__(self, version, ai_model):
+        self.version = version
+        self.ai_model = ai_model
+        self.models = ai_model.models
+        self.scalers = ai_model.scalers
+        self.encoders = ai_model.encoders
+        self.loaded_at = time.time()
+
+class ModelRegistry:
+    """Loads model artifacts once per process and hot-swaps them when they change.
+
+    Change detection uses the manifest written by save_models() when present,
+    otherwise the mtimes and sizes of the artifact files. A new snapshot is
+    fully loaded before it replaces the current one, so requests holding the
+    previous snapshot finish on a consistent set of models. Snapshots loaded
+    from a model bundle reference its memory map, so processes serving the
+    same version share one copy of the arrays. With `compile_trees` each
+    snapshot also carries the compiled generation trees.
+    """
+
+    def __init__(self, model_path='models/', check_interval=1.0, compile_trees=False):
+        self.model_path = model_path
+        self.check_interval = check_interval
+        self.compile_trees = compile_trees
+        self._snapshot = None
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def _artifact_signature(self):
+        """Cheap fingerprint of the artifacts on disk, or None if they are missing"""
+        manifest_path = os.path.join(self.model_path, MANIFEST_FILE)
+        paths = [manifest_path] if os.path.exists(manifest_path) else \
+            [os.path.join(self.model_path, name) for name in ARTIFACT_FILES]
+        try:
+            stats = [os.stat(p) for p in paths]
+        except FileNotFoundError:
+            return None
+        return tuple((p, s.st_mtime_ns, s.st_size) for p, s in zip(paths, stats))
+
+    def _read_version(self, signature):
+        manifest_path = os.path.join(self.model_path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                return json.load(f)['version']
+        return hashlib.sha256(repr(signature).encode()).hexdigest()[:12]
+
+    def _load(self, signature):
+        ai_model = RenewableEnergyAIModel(inference_only=True)
+        ai_model.load_models(self.model_path, compile_trees=self.compile_trees)
+        return ModelSnapshot(self._read_version(signature), ai_model)
+
+    def reload(self, force=False):
+        """Reload artifacts if they changed on disk; returns the current snapshot"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            signature = self._artifact_signature()
+            if signature is None or (signature == self._signature and not force):
+                return self._snapshot
+            try:
+                snapshot = self._load(signature)
+            except Exception as e:
+                # Keep serving the previous version if the new one cannot be read yet
+                print(f"Error loading models: {e}")
+                return self._snapshot
+            self._snapshot, self._signature = snapshot, signature
+            print(f"Loaded model version {snapshot.version}")
+            return snapshot
+
+    def get(self):
+        """Current snapshot, checking disk at most once per `check_interval` seconds"""
+        if self._snapshot is None or time.monotonic() - self._last_check >= self.check_interval:
+            return self.reload()
+        return self._snapshot
+
+class RegistryBinding:
+    """Mixin binding an optimizer to a ModelRegistry's current snapshot.
+
+    The bound snapshot is swapped by one reference assignment, so a reload
+    never mixes artifacts of two versions. Requests should read the
+    snapshot (or `ai_model`) once and use it throughout.
+    """
+
+    def bind_registry(self, model_path='models/', registry=None):
+        # Used only until a snapshot is bound (e.g. to train the first models); the dataset loads lazily
+        self._untrained_model = RenewableEnergyAIModel(inference_only=True)
+        self.model_path = model_path
+        self.registry = registry or ModelRegistry(model_path)
+        self.snapshot = None
+
+    def load_trained_models(self):
+        """Bind the registry's current model snapshot (loaded once per process)"""
+        snapshot = self.registry.get()
+        if snapshot is None:
+            print(f"Error loading models: no artifacts found in {self.model_path}")
+            return False
+
+        if snapshot is not self.snapshot:
+            # One reference swap: readers see the old or the new model set, never a mix of both
+            self.snapshot = snapshot
+            print(f"AI models loaded successfully (version {snapshot.version})")
+        return True
+
+    @property
+    def ai_model(self):
+        """Model set of the bound snapshot. Read it once per request: a reload may swap it at any time"""
+        snapshot = self.snapshot
+        return snapshot.ai_model if snapshot is not None else self._untrained_model
+
+    @property
+    def model_version(self):
+        snapshot = self.snapshot
+        return snapshot.version if snapshot is not None else None
+
+    def current_snapshot(self):
+        """Bind and return the current snapshot, training and saving models first if there are none"""
+        with span('load_models'):
+            models_loaded = self.load_trained_models()
+        if not models_loaded:
+            print("Training models first...")
+            with span('train_models'):
+                self._untrained_model.train_all_models()
+                self._untrained_model.save_models(self.model_path)
+                self.registry.reload()
+                self.load_trained_models()
+        if self.snapshot is None:
+            raise RuntimeError(f"No model artifacts in {self.model_path}")
+        return self.snapshot
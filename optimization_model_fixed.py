@@ -1,69 +1,119 @@
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from ai_model_trainer_simple import RenewableEnergyAIModel
+from model_registry import RegistryBinding
+from forecast_features import build_forecast_features, build_row_features, baseline_demand, baseline_price
+from metrics import increment, span
 import warnings
 warnings.filterwarnings('ignore')
 
-class RenewableEnergyOptimizer:
-    def __init__(self, model_path='models/'):
-        self.ai_model = RenewableEnergyAIModel()
-        self.model_path = model_path
-
-    def load_trained_models(self):
-        """Load pre-trained AI models"""
+# Ranges longer than this many hours are forecast chunk by chunk
+FORECAST_CHUNK_HOURS = 720
+
+def ordered_map(fn, items, n_threads=1, max_in_flight=None):
+    """Yield fn(*item) for each item, in order, running up to `n_threads` calls at once.
+
+    At most `max_in_flight` calls (default 2 * n_threads) are queued, running
+    or finished-but-unconsumed, so memory stays bounded however many items
+    there are. Each call runs in a copy of the caller's context, so metric
+    spans still reach the current request.
+    """
+    if n_threads <= 1:
+        for item in items:
+            yield fn(*item)
+        return
+
+    max_in_flight = max_in_flight or 2 * n_threads
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=n_threads, thread_name_prefix='forecast') as pool:
         try:
-            import joblib
-            import xgboost as xgb
-
-            self.ai_model.models['generation'] = xgb.XGBRegressor()
-            self.ai_model.models['generation'].load_model(f'{self.model_path}generation_model.json')
-            self.ai_model.scalers['generation'] = joblib.load(f'{self.model_path}generation_scaler.pkl')
-            self.ai_model.encoders['region'] = joblib.load(f'{self.model_path}region_encoder.pkl')
-
-            print("AI models loaded successfully")
-            return True
-        except Exception as e:
-            print(f"Error loading models: {e}")
-            return False
-
-    def generate_forecasts(self, start_date, end_date, regions):
-        """Generate forecasts for the optimization period"""
+            for item in items:
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(contextvars.copy_context().run, fn, *item))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Consumer stopped early or a chunk failed: drop the queued work
+            for future in pending:
+                future.cancel()
+
+class RenewableEnergyOptimizer(RegistryBinding):
+    def __init__(self, model_path='models/', registry=None, cache=None, forecast_threads=1,
+                 chunk_hours=FORECAST_CHUNK_HOURS, max_in_flight=None):
+        self.bind_registry(model_path, registry)
+        self.cache = cache
+        self.forecast_threads = forecast_threads
+        self.chunk_hours = chunk_hours
+        self.max_in_flight = max_in_flight
+
+    def generate_forecasts(self, start_date, end_date, regions, seed=None, ai_model=None):
+        """Generate forecasts for the optimization period; `seed` (int or Generator) makes them reproducible.
+
+        `ai_model` is the model set to use, by default the bound snapshot's.
+        Draws follow the same `chunk_hours` chunking as iter_forecasts, so a
+        seed gives the same forecasts here and in iter_optimization.
+        """
         print(f"Generating forecasts from {start_date} to {end_date}")
-
-        timestamps = pd.date_range(start_date, end_date, freq='H')
-        forecast_data = []
-        
-        for ts in timestamps:
-            for region in regions:
-                forecast_data.append({
-                    'timestamp': ts,
-                    'region': region,
-                    'hour': ts.hour,
-                    'month': ts.month,
-                    'weekday': ts.weekday(),
-                    'temperature': 25 + 10 * np.sin(2 * np.pi * ts.dayofyear / 365) + np.random.normal(0, 3),
-                    'wind_speed': max(0, 5 + 3 * np.sin(2 * np.pi * ts.hour / 24) + np.random.normal(0, 1.5)),
-                    'solar_irradiance': max(0, 600 * max(0, np.sin(np.pi * ts.hour / 12)) + np.random.normal(0, 50)),
-                    'humidity': 60 + 20 * np.sin(2 * np.pi * ts.dayofyear / 365) + np.random.normal(0, 5)
-                })
-
-        features_df = pd.DataFrame(forecast_data)
-        features_df['region_encoded'] = self.ai_model.encoders['region'].transform(features_df['region'])
+        chunks = self.iter_forecasts(start_date, end_date, regions, seed, ai_model=ai_model)
+        return pd.concat(list(chunks), ignore_index=True)
+
+    def iter_forecasts(self, start_date, end_date, regions, seed=None, chunk_hours=None, ai_model=None):
+        """Forecast frames for consecutive `chunk_hours` slices of the range, in order.
+
+        Chunks run on `forecast_threads` threads (model prediction and the
+        NumPy feature work release the GIL) with at most `max_in_flight`
+        outstanding. Each chunk draws from its own child of `seed`, so the
+        output depends on the chunk size but not on the thread count.
+        XGBoost's predict() runs its own OpenMP threads inside every chunk
+        thread, so keep forecast_threads small when several server processes
+        share a host.
+        """
+        chunk_hours = chunk_hours or self.chunk_hours
+        ai_model = ai_model or self.ai_model
+        timestamps = pd.date_range(start_date, end_date, freq='h')
+        chunks = [timestamps[start:start + chunk_hours] for start in range(0, len(timestamps), chunk_hours)]
+        rngs = np.random.default_rng(seed).spawn(len(chunks))
+        encoder = ai_model.encoders['region']
+
+        def forecast_chunk(chunk, rng):
+            with span('features'):
+                features_df = build_forecast_features(chunk[0], chunk[-1], regions, encoder, rng)
+            return self.predict_forecasts(features_df, rng, ai_model)
+
+        yield from ordered_map(forecast_chunk, zip(chunks, rngs), self.forecast_threads, self.max_in_flight)
+
+    def forecast_rows(self, rows, seed=None, ai_model=None):
+        """Forecasts for explicit (timestamp, region[, weather]) rows, in the given order"""
+        ai_model = ai_model or self.ai_model
+        rng = np.random.default_rng(seed)
+        with span('features'):
+            features_df = build_row_features(rows, ai_model.encoders['region'], rng)
+        return self.predict_forecasts(features_df, rng, ai_model)
+
+    def predict_forecasts(self, features_df, rng=None, ai_model=None):
+        """Add generation, demand and price forecast columns to a feature table, one vectorized call per model"""
+        rng = rng if rng is not None else np.random.default_rng()
+        ai_model = ai_model or self.ai_model
 
         # Generate forecasts
-        generation_forecast = self.ai_model.forecast_generation(features_df)
-        
-        # Simple forecasts for demand and price
-        demand_forecast = []
-        price_forecast = []
-        
-        for _, row in features_df.iterrows():
-            ts = row['timestamp']
-            base_demand = 8 + 4 * np.sin(2 * np.pi * ts.hour / 24)
-            demand_forecast.append(base_demand + np.random.normal(0, 0.5))
-            
-            base_price = 3500 + 1000 * np.sin(2 * np.pi * (ts.hour - 6) / 12)
-            price_forecast.append(max(2000, base_price + np.random.normal(0, 200)))
+        with span('predict_generation'):
+            generation_forecast = ai_model.forecast_generation(features_df)
+
+        # Persisted hourly profiles when available, otherwise simple patterns
+        with span('predict_demand_price'):
+            hours = features_df['hour'].values
+            if 'demand' in ai_model.models:
+                demand_forecast = ai_model.forecast_demand(features_df['timestamp'], features_df['region'], rng)
+            else:
+                demand_forecast = baseline_demand(hours, rng)
+
+            if 'price' in ai_model.models:
+                price_forecast = ai_model.forecast_price(features_df['timestamp'], features_df['region'], rng)
+            else:
+                price_forecast = baseline_price(hours, rng)
 
         results_df = features_df.copy()
         results_df['generation_forecast'] = generation_forecast
@@ -103,22 +153,80 @@ class RenewableEnergyOptimizer:
 
         return pd.DataFrame(optimization_results)
 
-    def run_optimization(self, start_date='2024-01-01', end_date='2024-01-02', regions=['North', 'South']):
-        """Run complete optimization workflow"""
+    def run_optimization(self, start_date='2024-01-01', end_date='2024-01-02', regions=['North', 'South'], seed=None,
+                         snapshot=None):
+        """Run complete optimization workflow.
+
+        Seeded runs are reproducible and, when a cache is attached, served from
+        it for the same parameters and model version. Everything is read from
+        one model snapshot: `snapshot`, or the current one.
+        """
         print(f"Running optimization from {start_date} to {end_date}")
+
+        snapshot = snapshot or self.current_snapshot()
+        ai_model, model_version = snapshot.ai_model, snapshot.version
+
+        use_cache = self.cache is not None and seed is not None
+        params = dict(start_date=str(start_date), end_date=str(end_date), regions=list(regions), seed=seed)
+        if use_cache:
+            with span('cache_get'):
+                cached = self.cache.get(model_version, **params)
+            increment('result_cache_requests_total', result='hit' if cached is not None else 'miss')
+            if cached is not None:
+                print("Serving cached optimization result")
+                return cached
         
-        if not self.load_trained_models():
-            print("Training models first...")
-            self.ai_model.train_all_models()
-            self.ai_model.save_models()
-            self.load_trained_models()
-        
-        forecasts = self.generate_forecasts(start_date, end_date, regions)
-        results = self.optimize_dispatch(forecasts)
-        summary = self.calculate_summary_metrics(results)
+        forecasts = self.generate_forecasts(start_date, end_date, regions, seed, ai_model)
+        with span('dispatch'):
+            results = self.optimize_dispatch(forecasts)
+        with span('summary'):
+            summary = self.calculate_summary_metrics(results)
+
+        if use_cache:
+            with span('cache_put'):
+                self.cache.put(model_version, results, summary, **params)
         
         return results, summary
     
+    def iter_optimization(self, start_date='2024-01-01', end_date='2024-01-02', regions=['North', 'South'],
+                          seed=None, chunk_hours=None, snapshot=None):
+        """Streaming run_optimization: yields dispatch frames chunk by chunk, then the summary dict.
+
+        Forecasting and dispatch work on `chunk_hours` at a time and the
+        summary is accumulated from running totals, so memory stays bounded
+        by the chunk size rather than the horizon. Each chunk draws from its
+        own child of `seed`: with the default chunk_hours (the optimizer's)
+        the rows match run_optimization for the same seed; another chunk
+        size gives different, equally reproducible draws.
+        """
+        print(f"Streaming optimization from {start_date} to {end_date}")
+        snapshot = snapshot or self.current_snapshot()
+
+        totals = dict.fromkeys(['total_revenue', 'total_costs', 'reliability', 'grid_import_total', 'grid_export_total'], 0.0)
+        n_rows = 0
+
+        # Later chunks are forecast on the thread pool while earlier ones are dispatched and streamed
+        for forecasts in self.iter_forecasts(start_date, end_date, regions, seed, chunk_hours, snapshot.ai_model):
+            with span('dispatch'):
+                results = self.optimize_dispatch(forecasts)
+
+            totals['total_revenue'] += results['revenue'].sum()
+            totals['total_costs'] += results['costs'].sum()
+            totals['reliability'] += results['reliability_score'].sum()
+            totals['grid_import_total'] += results['grid_import'].sum()
+            totals['grid_export_total'] += results['grid_export'].sum()
+            n_rows += len(results)
+            yield results
+
+        yield {
+            'total_revenue': totals['total_revenue'],
+            'total_costs': totals['total_costs'],
+            'net_profit': totals['total_revenue'] - totals['total_costs'],
+            'avg_reliability': totals['reliability'] / n_rows if n_rows else None,
+            'grid_import_total': totals['grid_import_total'],
+            'grid_export_total': totals['grid_export_total']
+        }
+
     def calculate_summary_metrics(self, results_df):
         """Calculate optimization summary metrics"""
         summary = {
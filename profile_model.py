@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+class HourlyProfileModel:
+    """Mean profile stored as a dense array indexed by [region, hour(, weekday)(, month)].
+
+    Fitted with one bincount reduction over all rows and queried with a single
+    fancy-indexing call. Sums and counts are kept so the profile can be
+    updated incrementally.
+    """
+
+    def __init__(self, by_weekday=False, by_month=False):
+        self.by_weekday = by_weekday
+        self.by_month = by_month
+        self.regions = np.array([], dtype=str)
+        self.sums = None
+        self.counts = None
+
+    @property
+    def shape(self):
+        shape = [len(self.regions), 24]
+        if self.by_weekday:
+            shape.append(7)
+        if self.by_month:
+            shape.append(12)
+        return tuple(shape)
+
+    @property
+    def values(self):
+        """Profile means; NaN where a cell has no observations"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.counts > 0, self.sums / np.maximum(self.counts, 1), np.nan)
+
+    def _index(self, timestamps, regions):
+        """Per-row index tuple into the profile array, plus region codes (-1 = unknown)"""
+        timestamps = pd.DatetimeIndex(timestamps)
+        codes = pd.Categorical(np.asarray(regions, dtype=object), categories=self.regions).codes.astype(np.int64)
+        index = [codes, timestamps.hour.values]
+        if self.by_weekday:
+            index.append(timestamps.weekday.values)
+        if self.by_month:
+            index.append(timestamps.month.values - 1)
+        return index, codes
+
+    def fit(self, df, target):
+        """Fit from a frame with timestamp, region and `target` columns"""
+        self.regions = np.array(sorted(pd.unique(df['region'].astype(str))), dtype=str)
+        self.sums = np.zeros(self.shape)
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        return self.partial_fit(df, target)
+
+    def partial_fit(self, df, target):
+        """Add observations to the running sums and counts"""
+        new_regions = np.setdiff1d(pd.unique(df['region'].astype(str)), self.regions)
+        if len(new_regions):
+            self._add_regions(new_regions)
+
+        index, _ = self._index(df['timestamp'], df['region'])
+        flat = np.ravel_multi_index(index, self.shape)
+        size = int(np.prod(self.shape))
+        # Not in place: loaded profiles may be read-only views of a memory-mapped bundle
+        self.sums = self.sums + np.bincount(flat, weights=df[target].values, minlength=size).reshape(self.shape)
+        self.counts = self.counts + np.bincount(flat, minlength=size).reshape(self.shape)
+        return self
+
+    def _add_regions(self, new_regions):
+        regions = np.array(sorted(set(self.regions) | set(new_regions)), dtype=str)
+        order = np.searchsorted(regions, self.regions)
+        sums = np.zeros((len(regions),) + self.shape[1:])
+        counts = np.zeros((len(regions),) + self.shape[1:], dtype=np.int64)
+        if self.sums is not None:
+            sums[order] = self.sums
+            counts[order] = self.counts
+        self.regions, self.sums, self.counts = regions, sums, counts
+
+    def predict(self, timestamps, regions):
+        """Profile values for each (timestamp, region) row; NaN for unknown regions or empty cells"""
+        index, codes = self._index(timestamps, regions)
+        predictions = np.full(len(codes), np.nan)
+        known = codes >= 0
+        if known.any():
+            predictions[known] = self.values[tuple(i[known] for i in index)]
+        return predictions
+
+    def save(self, path):
+        np.savez(path, regions=self.regions, sums=self.sums, counts=self.counts,
+                 by_weekday=self.by_weekday, by_month=self.by_month)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        model = cls(by_weekday=bool(data['by_weekday']), by_month=bool(data['by_month']))
+        model.regions = data['regions']
+        model.sums = data['sums']
+        model.counts = data['counts']
+        return model
@@ -0,0 +1,110 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from serialization import read_arrow_stream, to_arrow_stream
+
+class ResultCache:
+    """Two-tier cache of optimization results keyed by request parameters, seed and model version.
+
+    The memory tier is an LRU of the most recent results. The disk tier keeps
+    Arrow IPC files under `cache_dir` and evicts the least recently used files
+    once their total size passes `max_disk_bytes`. File names start with the
+    model version, so entries of other versions are never hit and age out
+    through eviction. The directory may be shared by several worker processes,
+    so every file operation tolerates a file another process just removed.
+    """
+
+    def __init__(self, cache_dir='cache/', max_memory_items=32, max_disk_bytes=256 << 20):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(model_version, **params):
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:24]
+        return f'{model_version}_{digest}'
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.arrow')
+
+    def _check_version(self, model_version):
+        """Drop the memory tier when the model version changes.
+
+        Disk entries are left alone: during a rolling reload other workers may
+        still be serving (and writing) the previous version.
+        """
+        if model_version == self._version:
+            return
+        self._memory.clear()
+        self._version = model_version
+
+    def get(self, model_version, **params):
+        """(results_df, summary) or None"""
+        key = self.make_key(model_version, **params)
+        with self._lock:
+            self._check_version(model_version)
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                results, summary = self._memory[key]
+                return results.copy(), dict(summary)
+
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    results, summary = read_arrow_stream(f.read())
+            except FileNotFoundError:
+                return None
+            with contextlib.suppress(FileNotFoundError):
+                os.utime(path)  # mark as recently used for disk eviction
+            self._remember(key, results, summary)
+            return results.copy(), dict(summary)
+
+    def put(self, model_version, results, summary, **params):
+        key = self.make_key(model_version, **params)
+        summary = {name: value.item() if hasattr(value, 'item') else value for name, value in summary.items()}
+        with self._lock:
+            self._check_version(model_version)
+            self._remember(key, results.copy(), summary)
+
+            tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(to_arrow_stream(results, summary))
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+
+    def _remember(self, key, results, summary):
+        self._memory[key] = (results, summary)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.arrow'):
+                with contextlib.suppress(FileNotFoundError):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.arrow'):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,136 @@
+import importlib
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from forecast_features import GENERATION_FEATURES, draw_weather
+from dispatch_kernel import rule_based_dispatch
+
+# Fields of RenewableEnergyOptimizer.calculate_summary_metrics, computed per scenario
+SUMMARY_FIELDS = ['total_revenue', 'total_costs', 'net_profit', 'avg_reliability',
+                  'total_battery_cycles', 'grid_import_total', 'grid_export_total']
+
+# Relative forecast uncertainty applied around the demand and price forecasts
+DEMAND_NOISE = 0.05
+PRICE_NOISE = 0.10
+
+_worker_optimizer = None
+
+class ScenarioEngine:
+    """Batched Monte-Carlo forecasting and dispatch for RenewableEnergyOptimizer.
+
+    Weather, demand and price scenarios are drawn as (scenario, time, region)
+    arrays. Each batch of scenarios goes through one generation-model call and
+    one vectorized dispatch pass, and batches are spread over a process pool
+    when there are enough of them.
+    """
+
+    def __init__(self, optimizer, batch_size=500, n_workers=None):
+        self.optimizer = optimizer
+        self.batch_size = batch_size
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+
+    def run(self, start_date, end_date, regions, n_scenarios=1000, seed=None,
+            percentiles=(5, 25, 50, 75, 95)):
+        """Simulate `n_scenarios` and summarize each metric by percentile.
+
+        Returns {'n_scenarios', 'percentiles': {field: {'p5': ...}}, 'mean': {field: ...}}.
+        Each batch draws from its own child of `seed`, so results are
+        reproducible for a fixed (seed, batch_size) whatever the worker count;
+        a different batch_size gives different, equally valid draws.
+        """
+        print(f"Running {n_scenarios} scenarios from {start_date} to {end_date}")
+        if not self.optimizer.load_trained_models():
+            raise ValueError("Trained models are required for scenario simulation")
+        # Every in-process batch uses the same snapshot, even if the registry reloads mid-run
+        ai_model = self.optimizer.ai_model
+
+        timestamps = pd.date_range(start_date, end_date, freq='h')
+        sizes = [min(self.batch_size, n_scenarios - i) for i in range(0, n_scenarios, self.batch_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        tasks = [(timestamps, list(regions), size, child) for size, child in zip(sizes, seeds)]
+
+        if self.n_workers > 1 and len(tasks) > 1:
+            # spawn, not fork: XGBoost's OpenMP runtime is not fork-safe
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(self.n_workers, len(tasks)), mp_context=context,
+                                     initializer=_init_worker, initargs=self._worker_spec()) as pool:
+                batches = list(pool.map(_simulate_in_worker, tasks))
+        else:
+            batches = [simulate_batch(self.optimizer, *task, ai_model=ai_model) for task in tasks]
+
+        metrics = {field: np.concatenate([b[field] for b in batches]) for field in SUMMARY_FIELDS}
+        return {
+            'n_scenarios': n_scenarios,
+            'percentiles': {
+                field: {f'p{p:g}': float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+                for field, values in metrics.items()
+            },
+            'mean': {field: float(values.mean()) for field, values in metrics.items()}
+        }
+
+    def _worker_spec(self):
+        """(module, qualname, model_path) to rebuild the optimizer, whatever its class, in a pool process"""
+        cls = type(self.optimizer)
+        return cls.__module__, cls.__qualname__, self.optimizer.model_path
+
+def simulate_batch(optimizer, timestamps, regions, n_scenarios, seed, ai_model=None):
+    """Forecast and dispatch one batch of scenarios; returns per-scenario metric arrays"""
+    rng = np.random.default_rng(seed)
+    ai_model = ai_model or optimizer.ai_model
+    S, T, R = n_scenarios, len(timestamps), len(regions)
+
+    # Generation: one model call over all S x T x R feature rows
+    weather = draw_weather(timestamps, R, rng, n_scenarios=S)
+    calendar = {
+        'hour': timestamps.hour.values[None, :, None],
+        'month': timestamps.month.values[None, :, None],
+        'weekday': timestamps.weekday.values[None, :, None],
+        'region_encoded': ai_model.encoders['region'].transform(regions)[None, None, :]
+    }
+    columns = {**calendar, **weather}
+    features_df = pd.DataFrame({name: np.broadcast_to(columns[name], (S, T, R)).ravel()
+                                for name in GENERATION_FEATURES})
+    generation = ai_model.forecast_generation(features_df).reshape(S, T, R)
+
+    # Demand and price: one (T, R) forecast, perturbed per scenario
+    grid_timestamps = np.repeat(timestamps.values, R)
+    grid_regions = np.tile(np.asarray(regions, dtype=object), T)
+    demand_base = ai_model.forecast_demand(grid_timestamps, grid_regions, rng).reshape(T, R)
+    price_base = ai_model.forecast_price(grid_timestamps, grid_regions, rng).reshape(T, R)
+    demand = np.maximum(0, demand_base * (1 + rng.normal(0, DEMAND_NOISE, (S, T, R))))
+    price = np.maximum(0, price_base * (1 + rng.normal(0, PRICE_NOISE, (S, T, R))))
+
+    # System-wide dispatch for all scenarios in one vectorized pass
+    total_generation = generation.sum(axis=2, dtype=float)
+    total_demand = demand.sum(axis=2)
+    avg_price = price.mean(axis=2)
+    decisions = rule_based_dispatch(total_generation, total_demand, avg_price, battery_soc=50, hydro_soc=60)
+    revenue, costs, reliability = optimizer.dispatch_economics(total_generation, total_demand, avg_price, decisions)
+
+    total_revenue = revenue.sum(axis=1)
+    total_costs = costs.sum(axis=1)
+    return {
+        'total_revenue': total_revenue,
+        'total_costs': total_costs,
+        'net_profit': total_revenue - total_costs,
+        'avg_reliability': reliability.mean(axis=1),
+        'total_battery_cycles': (decisions['battery_charge'].sum(axis=1) + decisions['battery_discharge'].sum(axis=1)) / 2,
+        'grid_import_total': decisions['grid_import'].sum(axis=1),
+        'grid_export_total': decisions['grid_export'].sum(axis=1)
+    }
+
+def _init_worker(module, qualname, model_path):
+    """Load the models once per pool process; batches already run in parallel, so predict single-threaded"""
+    global _worker_optimizer
+    optimizer_class = importlib.import_module(module)
+    for name in qualname.split('.'):
+        optimizer_class = getattr(optimizer_class, name)
+
+    _worker_optimizer = optimizer_class(model_path)
+    _worker_optimizer.load_trained_models()
+    _worker_optimizer.ai_model.models['generation'].set_params(n_jobs=1)
+
+def _simulate_in_worker(task):
+    return simulate_batch(_worker_optimizer, *task)
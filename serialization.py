@@ -0,0 +1,77 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Response formats for optimization results, keyed by ?format= name
+FORMATS = {
+    'records': 'application/json',
+    'columnar': 'application/vnd.gridzenith.columnar+json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'ndjson': 'application/x-ndjson'
+}
+DEFAULT_FORMAT = 'records'
+
+def negotiate_format(request):
+    """Pick a response format from ?format= or the Accept header; defaults to row records"""
+    requested = request.args.get('format')
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown format '{requested}', expected one of {sorted(FORMATS)}")
+        return requested
+
+    # Plain application/json and */* keep the original row-records layout
+    best = request.accept_mimetypes.best_match([FORMATS[DEFAULT_FORMAT], FORMATS['columnar'], FORMATS['arrow'], FORMATS['ndjson']])
+    for name, mimetype in FORMATS.items():
+        if mimetype == best:
+            return name
+    return DEFAULT_FORMAT
+
+def column_values(series):
+    """JSON-ready list for one result column, converted in bulk from the NumPy array"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return np.datetime_as_string(series.values, unit='s').tolist()
+    return series.to_numpy().tolist()
+
+def to_records(results_df):
+    """Row records (the original layout) built from bulk-converted columns"""
+    names = list(results_df.columns)
+    columns = [column_values(results_df[name]) for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+def to_ndjson(results_df):
+    """Newline-delimited JSON, one row record per line"""
+    return ''.join(json.dumps(record) + '\n' for record in to_records(results_df))
+
+def to_columnar_json(results_df, metadata):
+    """One array per field instead of one object per row"""
+    payload = dict(metadata)
+    payload['n_rows'] = len(results_df)
+    payload['columns'] = {name: column_values(results_df[name]) for name in results_df.columns}
+    return json.dumps(payload)
+
+def to_arrow_stream(results_df, metadata):
+    """Arrow IPC stream of the results; `metadata` travels as JSON in the schema metadata"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(results_df, preserve_index=False)
+    table = table.replace_schema_metadata({'metadata': json.dumps(metadata)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def read_arrow_stream(data):
+    """Inverse of to_arrow_stream: (results DataFrame, metadata dict)"""
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(data).read_all()
+    metadata = json.loads(table.schema.metadata[b'metadata'])
+    return table.to_pandas(), metadata
+
+def serialize_results(results_df, metadata, fmt):
+    """Encode results for the columnar formats; returns (body, mimetype)"""
+    if fmt == 'columnar':
+        return to_columnar_json(results_df, metadata), FORMATS['columnar']
+    if fmt == 'arrow':
+        return to_arrow_stream(results_df, metadata), FORMATS['arrow']
+    raise ValueError(f"serialize_results does not handle format '{fmt}'")
@@ -1,6 +1,18 @@
 import pandas as pd
 import numpy as np
 import os
+import dataset_store
+
+# Per-region generator parameters shared by both dataset builders. Regions not
+# listed here fall back to DEFAULT_REGION_PARAMS (wind-type profile).
+REGION_PARAMS = {
+    'North': {'gen_base': 6, 'gen_var': 2, 'demand_base': 8, 'demand_var': 3, 'price_base': 3000},
+    'South': {'gen_base': 8, 'gen_var': 3, 'demand_base': 10, 'demand_var': 4, 'price_base': 3500},
+    'East': {'gen_base': 5, 'gen_var': 2, 'demand_base': 7, 'demand_var': 3, 'price_base': 2800},
+    'West': {'gen_base': 7, 'gen_var': 2.5, 'demand_base': 9, 'demand_var': 3.5, 'price_base': 3200},
+    'North-East': {'gen_base': 4, 'gen_var': 1.5, 'demand_base': 6, 'demand_var': 2.5, 'price_base': 2600}
+}
+DEFAULT_REGION_PARAMS = {'gen_base': 6, 'gen_var': 2, 'demand_base': 8, 'demand_var': 3, 'price_base': 3000}
 
 def create_synthetic_dataset():
     """Create a synthetic 5-year renewable energy dataset"""
@@ -24,16 +36,7 @@ def create_synthetic_dataset():
     for region in regions:
         print(f"Processing region: {region}")
 
-        # Base parameters for each region (simulating different characteristics)
-        region_params = {
-            'North': {'gen_base': 6, 'gen_var': 2, 'demand_base': 8, 'demand_var': 3, 'price_base': 3000},
-            'South': {'gen_base': 8, 'gen_var': 3, 'demand_base': 10, 'demand_var': 4, 'price_base': 3500},
-            'East': {'gen_base': 5, 'gen_var': 2, 'demand_base': 7, 'demand_var': 3, 'price_base': 2800},
-            'West': {'gen_base': 7, 'gen_var': 2.5, 'demand_base': 9, 'demand_var': 3.5, 'price_base': 3200},
-            'North-East': {'gen_base': 4, 'gen_var': 1.5, 'demand_base': 6, 'demand_var': 2.5, 'price_base': 2600}
-        }
-
-        params = region_params[region]
+        params = REGION_PARAMS.get(region, DEFAULT_REGION_PARAMS)
 
         # Generate time series data
         for i, ts in enumerate(timestamps):
@@ -120,6 +123,90 @@ def create_synthetic_dataset():
 
     return df
 
+def create_synthetic_dataset_vectorized(start_date='2019-01-01', end_date='2023-12-31',
+                                        regions=None, seed=None, freq='h'):
+    """Create the synthetic dataset with whole-column NumPy operations.
+
+    Produces the same schema and distributions as create_synthetic_dataset(),
+    but draws every random column for all timestamps x regions at once.
+    `seed` may be an int, None or an existing np.random.Generator.
+    """
+    if regions is None:
+        regions = ['North', 'South', 'East', 'West', 'North-East']
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    timestamps = pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq=freq)
+    regions = np.array(sorted(regions), dtype=object)  # matches sort_values(['timestamp', 'region'])
+    n_hours, n_regions = len(timestamps), len(regions)
+    shape = (n_hours, n_regions)
+
+    # Time features, shape (T, 1) so they broadcast against per-region columns
+    hour = timestamps.hour.values[:, None]
+    month = timestamps.month.values[:, None]
+    weekday = timestamps.weekday.values[:, None]
+    day_of_year = timestamps.dayofyear.values[:, None]
+    annual_wave = np.sin(2 * np.pi * day_of_year / 365)
+
+    # Region parameters, shape (1, R)
+    params = [REGION_PARAMS.get(region, DEFAULT_REGION_PARAMS) for region in regions]
+    gen_base = np.array([p['gen_base'] for p in params], dtype=float)[None, :]
+    gen_var = np.array([p['gen_var'] for p in params], dtype=float)[None, :]
+    demand_base = np.array([p['demand_base'] for p in params], dtype=float)[None, :]
+    demand_var = np.array([p['demand_var'] for p in params], dtype=float)[None, :]
+    price_base = np.array([p['price_base'] for p in params], dtype=float)[None, :]
+    is_south = (regions == 'South')[None, :]
+    is_north = (regions == 'North')[None, :]
+
+    # Seasonal generation patterns (solar-heavy South, wind-heavy North)
+    seasonal_factor = np.where(
+        is_south, 1 + 0.5 * np.sin(2 * np.pi * (day_of_year - 80) / 365),
+        np.where(is_north, 1 + 0.3 * annual_wave, 1 + 0.2 * annual_wave))
+
+    # Hourly patterns
+    solar_factor = np.where((hour >= 6) & (hour <= 18), np.maximum(0, np.sin(np.pi * hour / 12)), 0.1)
+    wind_factor = 0.5 + 0.5 * np.sin(2 * np.pi * hour / 24)
+    hourly_gen_factor = np.where(is_south, solar_factor, wind_factor)
+
+    generation = np.maximum(0, gen_base * seasonal_factor * hourly_gen_factor
+                            + rng.normal(0, 1, shape) * gen_var)
+
+    demand_factor = 0.7 + 0.6 * (1 / (1 + np.exp(-(hour - 12) / 2)))
+    demand = np.maximum(0, demand_base * demand_factor + rng.normal(0, 1, shape) * demand_var)
+
+    price_volatility = 0.1 + 0.2 * demand_factor
+    price = np.clip(price_base * (1 + rng.normal(0, 1, shape) * price_volatility), 1000, 8000)
+
+    # Storage SoC: charge at night, discharge at peak, noise otherwise
+    uniform = rng.uniform(0, 1, shape)
+    soc_trend = np.where(
+        (hour >= 22) | (hour <= 6), 0.5 + 1.5 * uniform,
+        np.where((hour >= 10) & (hour <= 16), -1.5 + uniform, rng.normal(0, 0.3, shape)))
+    storage_soc = np.clip(50 + soc_trend * 10, 10, 90)
+
+    # Weather data (simplified)
+    temperature = 25 + 10 * annual_wave + rng.normal(0, 5, shape)
+    wind_speed = np.maximum(0, 5 + 3 * np.sin(2 * np.pi * hour / 24) + rng.normal(0, 2, shape))
+    solar_irradiance = np.maximum(0, 600 * hourly_gen_factor + rng.normal(0, 100, shape))
+    humidity = np.clip(60 + 20 * annual_wave + rng.normal(0, 10, shape), 10, 100)
+
+    df = pd.DataFrame({
+        'timestamp': np.repeat(timestamps.values, n_regions),
+        'region': np.tile(regions, n_hours),
+        'generation': generation.round(2).ravel(),
+        'demand': demand.round(2).ravel(),
+        'price': price.round(0).ravel(),
+        'storage_soc': storage_soc.round(1).ravel(),
+        'temperature': temperature.round(1).ravel(),
+        'wind_speed': wind_speed.round(1).ravel(),
+        'solar_irradiance': solar_irradiance.round(0).ravel(),
+        'humidity': humidity.round(1).ravel(),
+        'hour': np.broadcast_to(hour, shape).ravel(),
+        'month': np.broadcast_to(month, shape).ravel(),
+        'weekday': np.broadcast_to(weekday, shape).ravel()
+    })
+
+    return df
+
 def save_dataset(df, filename='renewable_5yr_hourly.csv'):
     """Save the dataset to CSV"""
     df.to_csv(filename, index=False)
@@ -133,11 +220,12 @@ def save_dataset(df, filename='renewable_5yr_hourly.csv'):
     print(df.head())
 
 if __name__ == "__main__":
-    # Create the dataset
-    dataset = create_synthetic_dataset()
+    # Create the dataset (seeded, vectorized builder)
+    dataset = create_synthetic_dataset_vectorized(seed=42)
 
-    # Save to CSV
+    # Save to CSV and to the columnar store the trainers read from
     save_dataset(dataset)
+    dataset_store.write_dataset(dataset, dataset_store.store_path_for('renewable_5yr_hourly.csv'))
 
     print("\n✅ Synthetic renewable energy dataset creation complete!")
     print("This dataset includes 5 years of hourly data across 5 Indian regions.")
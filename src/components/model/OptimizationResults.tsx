@@ -3,31 +3,62 @@ import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
 import { Progress } from "@/components/ui/progress";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
+import { Switch } from "@/components/ui/switch";
+import { Label } from "@/components/ui/label";
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, BarChart, Bar } from 'recharts';
 import { Play, Zap, TrendingUp, Battery, Droplets, Loader2 } from "lucide-react";
 import { useState } from "react";
 
+// Job polling: one status check per interval, giving up after MAX_POLL_ATTEMPTS (2 minutes)
+const POLL_INTERVAL_MS = 1000;
+const MAX_POLL_ATTEMPTS = 120;
+// Seed sent in reproducible mode; seeded runs are served from the server's result cache
+const REPRODUCIBLE_SEED = 42;
+
 const OptimizationResults = () => {
   const [isRunning, setIsRunning] = useState(false);
   const [results, setResults] = useState(null);
   const [error, setError] = useState(null);
+  const [reproducible, setReproducible] = useState(false);
+
+  const API_URL = 'https://grid-zenith-flow-2.onrender.com/api';
 
   const runOptimization = async () => {
     setIsRunning(true);
     setError(null);
     
     try {
-      const response = await fetch('https://grid-zenith-flow-2.onrender.com/api/optimize', {
+      // Submit as a background job, then poll until the result is ready
+      const response = await fetch(`${API_URL}/jobs/optimize`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           start_date: '2024-01-01',
           end_date: '2024-01-02',
-          regions: ['North', 'South']
+          regions: ['North', 'South'],
+          // Unseeded by default, so every run draws fresh scenarios
+          ...(reproducible ? { seed: REPRODUCIBLE_SEED } : {})
         })
       });
       
-      const data = await response.json();
+      const job = await response.json();
+      if (!job.success) {
+        setError(job.error);
+        return;
+      }
+
+      let data;
+      let attempts = 0;
+      do {
+        if (attempts >= MAX_POLL_ATTEMPTS) {
+          setError(`Optimization did not finish within ${MAX_POLL_ATTEMPTS * POLL_INTERVAL_MS / 1000} seconds`);
+          return;
+        }
+        attempts += 1;
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        const resultResponse = await fetch(`${API_URL}/jobs/${job.job_id}/result`);
+        data = await resultResponse.json();
+      } while (data.status === 'queued' || data.status === 'running');
       
       if (data.success) {
         setResults(data);
@@ -69,6 +100,15 @@ const OptimizationResults = () => {
         </CardHeader>
         <CardContent>
           <div className="space-y-4">
+            <div className="flex items-center gap-2">
+              <Switch
+                id="reproducible"
+                checked={reproducible}
+                onCheckedChange={setReproducible}
+                disabled={isRunning}
+              />
+              <Label htmlFor="reproducible">Reproducible (fixed seed, same inputs return the same result)</Label>
+            </div>
             <Button 
               onClick={runOptimization} 
               disabled={isRunning}
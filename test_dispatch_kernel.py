@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dispatch_kernel import rule_based_dispatch
+from dispatch_planner import DispatchPlanner
+
+REGIONS = ['North', 'South', 'East']
+
+@pytest.fixture
+def forecasts():
+    """Seeded regional forecasts with prices spread over the low, normal and high bands"""
+    rng = np.random.default_rng(42)
+    timestamps = pd.date_range('2024-01-01', periods=240, freq='h')
+    n = len(timestamps) * len(REGIONS)
+    return pd.DataFrame({
+        'timestamp': np.repeat(timestamps, len(REGIONS)),
+        'region': np.tile(REGIONS, len(timestamps)),
+        'generation_forecast': rng.uniform(0, 4, n),
+        'demand_forecast': rng.uniform(0, 4, n),
+        'price_forecast': rng.uniform(2000, 6500, n)
+    })
+
+def loop_dispatch(planner, forecasts_df):
+    """The per-hour groupby loop that optimize_dispatch(method='rule') replaced"""
+    optimization_results = []
+    for timestamp, group in forecasts_df.groupby('timestamp'):
+        optimization_results.append(planner._optimize_single_hour(
+            group['generation_forecast'].sum(), group['demand_forecast'].sum(),
+            group['price_forecast'].mean(), 50, 60, timestamp
+        ))
+    return pd.DataFrame(optimization_results)
+
+def test_kernel_matches_loop(forecasts):
+    planner = DispatchPlanner()
+    expected = loop_dispatch(planner, forecasts)
+    actual = planner.optimize_dispatch(forecasts, method='rule')
+    assert set(np.unique(np.digitize(expected['price'], [3000, 4500]))) == {0, 1, 2}
+    pd.testing.assert_frame_equal(actual[expected.columns], expected, check_dtype=False, check_exact=True)
+
+def test_high_price_branch():
+    planner = DispatchPlanner()
+    # Net demand below, at and above what the battery alone covers (0.5 at 50% SoC)
+    generation = np.array([3.0, 3.0, 3.0, 1.0, 5.0])
+    demand = np.array([3.2, 3.5, 4.0, 4.0, 2.0])
+    price = np.full(5, 5000.0)
+    decisions = rule_based_dispatch(generation, demand, price)
+    for t in range(len(price)):
+        expected = planner._optimize_single_hour(generation[t], demand[t], price[t], 50, 60, None)
+        for name, values in decisions.items():
+            assert values[t] == pytest.approx(expected[name], abs=1e-12), (t, name)
+    assert decisions['hydro_discharge'][:2].tolist() == [0, 0]
+    assert (decisions['hydro_discharge'][2:4] > 0).all()
+
+def test_carry_soc_matches_threaded_loop():
+    planner = DispatchPlanner()
+    rng = np.random.default_rng(7)
+    generation, demand = rng.uniform(0, 4, (2, 3, 100))
+    price = rng.uniform(2000, 6500, (3, 100))
+
+    batched = rule_based_dispatch(generation, demand, price, carry_soc=True)
+    for s in range(3):
+        single = rule_based_dispatch(generation[s], demand[s], price[s], carry_soc=True)
+        battery_soc, hydro_soc = 50, 60
+        for t in range(100):
+            expected = planner._optimize_single_hour(generation[s, t], demand[s, t], price[s, t],
+                                                     battery_soc, hydro_soc, None)
+            battery_soc, hydro_soc = expected['final_soc_battery'], expected['final_soc_hydro']
+            for name in single:
+                assert single[name][t] == pytest.approx(expected[name], abs=1e-9), (s, t, name)
+                assert batched[name][s, t] == pytest.approx(single[name][t], abs=1e-9), (s, t, name)
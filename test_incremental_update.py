@@ -0,0 +1,54 @@
+import os
+import shutil
+import threading
+import time
+import pandas as pd
+import xgboost as xgb
+from ai_model_trainer_simple import RenewableEnergyAIModel
+from simple_data_processor import create_synthetic_dataset_vectorized
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+def booster_rounds(path):
+    model = xgb.XGBRegressor()
+    model.load_model(os.path.join(path, 'generation_model.json'))
+    return model.get_booster().num_boosted_rounds()
+
+def test_concurrent_updates_are_not_lost(tmp_path, monkeypatch):
+    shutil.copytree(MODEL_PATH, tmp_path / 'models')
+    create_synthetic_dataset_vectorized('2023-12-31', '2023-12-31 23:00', seed=0).to_csv(
+        tmp_path / 'renewable_5yr_hourly.csv', index=False)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JOB_DB_PATH', str(tmp_path / 'jobs.db'))
+    monkeypatch.setenv('RESULT_CACHE_DIR', str(tmp_path / 'cache'))
+    import api_server
+
+    # Widen the window between loading and saving the artifacts so unserialized updates would overlap
+    update_models = RenewableEnergyAIModel.update_models
+    def slow_update_models(self, *args, **kwargs):
+        time.sleep(0.3)
+        return update_models(self, *args, **kwargs)
+    monkeypatch.setattr(RenewableEnergyAIModel, 'update_models', slow_update_models)
+
+    rounds_before = booster_rounds('models')
+    rows_before = len(pd.read_csv('renewable_5yr_hourly.csv'))
+    batches = [create_synthetic_dataset_vectorized(f'2024-01-0{day}', f'2024-01-0{day} 23:00', seed=day)
+               for day in (1, 2)]
+    bodies = [{'rows': batch.astype({'timestamp': str}).to_dict('records'), 'n_new_trees': 2} for batch in batches]
+
+    errors = []
+    def update(body):
+        try:
+            api_server.incremental_update(body)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=update, args=(body,)) for body in bodies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    # Both updates' trees and rows survive
+    assert booster_rounds('models') == rounds_before + 4
+    assert len(pd.read_csv('renewable_5yr_hourly.csv')) == rows_before + sum(len(batch) for batch in batches)
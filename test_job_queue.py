@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+import time
+from job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobManager, JobStore
+
+def test_stale_heartbeat_fails_job(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_id = store.create('optimize', {}, owner_id='previous-boot')
+    store.update(job_id, status=RUNNING, heartbeat_at=time.time() - 120)
+
+    assert store.fail_orphans(timeout=60) == 1
+    job = store.get(job_id)
+    assert job['status'] == FAILED
+    assert job['error'] == 'Interrupted by server restart'
+
+def test_live_owner_keeps_its_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_id = store.create('optimize', {}, owner_id='sibling')
+    store.update(job_id, heartbeat_at=time.time() - 50)
+    store.heartbeat('sibling')
+
+    # A starting worker's sweep must not fail jobs whose owner is still beating
+    assert store.fail_orphans(timeout=60) == 0
+    assert store.get(job_id)['status'] == QUEUED
+
+def test_manager_sweeps_orphans_and_runs_jobs(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    orphan = JobStore(db_path).create('optimize', {}, owner_id='previous-boot')
+    release = threading.Event()
+
+    manager = JobManager({'optimize': lambda params: release.wait(5) and {'ok': True}}, db_path=db_path,
+                         heartbeat_interval=0.05, heartbeat_timeout=0.5)
+    try:
+        job_id = manager.submit('optimize', {})
+        time.sleep(1)
+        # The orphan's heartbeat went stale; the running job's owner kept refreshing it
+        assert manager.status(orphan)['status'] == FAILED
+        assert manager.status(job_id)['status'] == RUNNING
+        release.set()
+    finally:
+        manager.shutdown()
+    assert manager.result(job_id)['status'] == SUCCEEDED
+    assert 'owner_id' not in manager.status(job_id)
+
+def test_migrates_pid_schema(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,
+                        params TEXT NOT NULL, result TEXT, error TEXT, owner_pid INTEGER,
+                        created_at REAL NOT NULL, started_at REAL, finished_at REAL)''')
+        conn.execute("INSERT INTO jobs (id, kind, status, params, owner_pid, created_at) VALUES ('old', 'optimize', ?, '{}', 1, ?)",
+                     (RUNNING, time.time() - 3600))
+
+    store = JobStore(db_path)
+    assert store.fail_orphans() == 1
+    assert store.get(store.create('optimize', {}, owner_id='new'))['status'] == QUEUED
@@ -0,0 +1,59 @@
+import os
+import joblib
+import numpy as np
+import pytest
+import xgboost as xgb
+from tree_compiler import CompiledTreeModel
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', '')
+
+@pytest.fixture(scope='module')
+def saved_model():
+    """The committed generation booster, its scaler and the compiled trees"""
+    model = xgb.XGBRegressor()
+    model.load_model(f'{MODEL_PATH}generation_model.json')
+    scaler = joblib.load(f'{MODEL_PATH}generation_scaler.pkl')
+    return model, scaler, CompiledTreeModel.from_booster(model, scaler)
+
+def xgboost_predict(model, scaler, X):
+    return model.predict(scaler.transform(X))
+
+def test_matches_xgboost_on_feature_ranges(saved_model):
+    model, scaler, compiled = saved_model
+    rng = np.random.default_rng(0)
+    # Spread rows around each feature's training distribution
+    X = scaler.mean_ + scaler.scale_ * rng.normal(0, 1.5, (5000, len(scaler.mean_)))
+    assert np.allclose(compiled.predict(X), xgboost_predict(model, scaler, X), rtol=1e-5, atol=1e-4)
+
+def test_matches_xgboost_on_split_boundaries(saved_model):
+    model, scaler, compiled = saved_model
+    splits = np.flatnonzero(np.isfinite(compiled.threshold))
+    rng = np.random.default_rng(1)
+    X = scaler.mean_ + scaler.scale_ * rng.normal(0, 1, (2 * len(splits), len(scaler.mean_)))
+    # Put one feature exactly on, and just below, every folded split point
+    rows = np.arange(len(splits))
+    X[rows, compiled.feature[splits]] = compiled.threshold[splits]
+    X[rows + len(splits), compiled.feature[splits]] = np.nextafter(compiled.threshold[splits], -np.inf)
+    assert np.allclose(compiled.predict(X), xgboost_predict(model, scaler, X), rtol=1e-5, atol=1e-4)
+
+def test_missing_values_follow_default_direction(saved_model):
+    model, scaler, compiled = saved_model
+    rng = np.random.default_rng(2)
+    X = scaler.mean_ + scaler.scale_ * rng.normal(0, 1, (2000, len(scaler.mean_)))
+    X[rng.random(X.shape) < 0.2] = np.nan
+    assert np.allclose(compiled.predict(X), xgboost_predict(model, scaler, X), rtol=1e-5, atol=1e-4)
+
+def test_without_scaler_matches_booster():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(500, 4))
+    y = X[:, 0] * 2 + np.sin(X[:, 1]) + rng.normal(0, 0.1, 500)
+    model = xgb.XGBRegressor(n_estimators=20, max_depth=4).fit(X, y)
+    compiled = CompiledTreeModel.from_booster(model)
+    assert np.allclose(compiled.predict(X), model.predict(X), rtol=1e-5, atol=1e-5)
+
+def test_rejects_non_identity_objective():
+    rng = np.random.default_rng(4)
+    X, y = rng.normal(size=(100, 3)), rng.integers(0, 2, 100)
+    model = xgb.XGBClassifier(n_estimators=2).fit(X, y)
+    with pytest.raises(ValueError):
+        CompiledTreeModel.from_booster(model)
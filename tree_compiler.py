@@ -0,0 +1,148 @@
+import json
+import numpy as np
+
+# Batches up to this many rows are faster through the compiled trees; above it the
+# (rows x trees) index temporaries make XGBoost's own predictor the better choice
+COMPILED_MAX_ROWS = 96
+
+# Objectives whose prediction is the raw margin (no link function to apply)
+IDENTITY_OBJECTIVES = ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror')
+
+class CompiledTreeModel:
+    """XGBoost tree ensemble flattened into contiguous node arrays.
+
+    Every tree's nodes are concatenated into one set of arrays (feature,
+    threshold, children, default_left, leaf value), with leaves pointing
+    to themselves so all rows and all trees advance one level per step for
+    `max_depth` steps. When a fitted StandardScaler is given, its transform is
+    folded into the thresholds (x_scaled < t  <=>  x < t * scale + mean), so
+    predict() takes raw, unscaled features.
+    """
+
+    # Node arrays, in the order a model bundle stores them
+    ARRAYS = ('feature', 'threshold', 'children', 'default_left', 'value', 'roots')
+
+    def __init__(self, feature, threshold, children, default_left, value, roots, max_depth, base_score):
+        self.feature = feature
+        self.threshold = threshold
+        # Interleaved [left, right] per node, indexed by 2 * node + go_right
+        self.children = children
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_score = base_score
+
+    @classmethod
+    def from_booster(cls, booster, scaler=None):
+        """Compile an xgboost Booster (or XGBRegressor), optionally folding a StandardScaler"""
+        if hasattr(booster, 'get_booster'):
+            booster = booster.get_booster()
+        model = json.loads(booster.save_raw('json'))
+        learner = model['learner']
+
+        objective = learner['objective']['name']
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Cannot compile objective {objective}; only identity-link regression is supported")
+        gbm = learner['gradient_booster']
+        if gbm.get('name', 'gbtree') != 'gbtree':
+            raise ValueError(f"Cannot compile booster type {gbm['name']}")
+        trees = gbm['model']['trees']
+
+        sizes = [len(tree['left_children']) for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+        feature = np.concatenate([tree['split_indices'] for tree in trees]).astype(np.int64)
+        threshold = np.concatenate([tree['split_conditions'] for tree in trees]).astype(np.float64)
+        default_left = np.concatenate([tree['default_left'] for tree in trees]).astype(bool)
+        left = np.concatenate([np.asarray(tree['left_children'], dtype=np.int64) for tree in trees])
+        right = np.concatenate([np.asarray(tree['right_children'], dtype=np.int64) for tree in trees])
+
+        # Child ids are tree-local; leaves (-1) point to themselves
+        node_ids = np.arange(len(left))
+        tree_offset = np.repeat(offsets, sizes)
+        is_leaf = left < 0
+        left = np.where(is_leaf, node_ids, left + tree_offset)
+        right = np.where(is_leaf, node_ids, right + tree_offset)
+        # For leaves, split_conditions holds the leaf weight
+        value = np.where(is_leaf, threshold, 0.0).astype(np.float32)
+        feature = np.where(is_leaf, 0, feature)
+
+        n_features = int(learner['learner_model_param']['num_feature'])
+        mean, scale = np.zeros(n_features), np.ones(n_features)
+        if scaler is not None:
+            if getattr(scaler, 'mean_', None) is not None:
+                mean = scaler.mean_
+            if getattr(scaler, 'scale_', None) is not None:
+                scale = scaler.scale_
+        threshold = fold_thresholds(threshold.astype(np.float32), mean[feature], scale[feature])
+        threshold = np.where(is_leaf, np.inf, threshold)
+
+        depth = max(_tree_depth(tree) for tree in trees) if trees else 0
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+
+        children = np.column_stack([left, right]).ravel()
+        return cls(feature, threshold, children, default_left, value, offsets, depth, np.float32(base_score))
+
+    def predict(self, X):
+        """Predictions for an (n_rows, n_features) array of raw features"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offset = (np.arange(n_rows) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        has_nan = np.isnan(flat).any()
+
+        # np.take on flat arrays is markedly faster than fancy indexing for these small gathers
+        for _ in range(self.max_depth):
+            x = np.take(flat, row_offset + np.take(self.feature, nodes))
+            go_right = x >= np.take(self.threshold, nodes)
+            if has_nan:
+                missing = np.isnan(x)
+                go_right[missing] = ~self.default_left[nodes[missing]]
+            nodes = np.take(self.children, 2 * nodes + go_right)
+
+        # Accumulate in float32 like XGBoost
+        return np.take(self.value, nodes).sum(axis=1, dtype=np.float32) + self.base_score
+
+def fold_thresholds(threshold, mean, scale):
+    """Raw-feature split points equivalent to XGBoost's test on scaled features.
+
+    XGBoost goes left when float32((x - mean) / scale) < threshold. Hist cut
+    points are observed values, so rows often sit exactly on a split and a
+    plain `threshold * scale + mean` misroutes them. Instead this returns, per
+    node, the smallest float64 x that goes right, so `x < folded` reproduces
+    the float32 comparison exactly.
+    """
+    threshold = np.asarray(threshold, dtype=np.float32)
+    below = np.nextafter(threshold, np.float32(-np.inf))
+    # Scaled values v round to >= threshold iff v > midpoint, or v == midpoint with an odd `below`
+    midpoint = (below.astype(np.float64) + threshold.astype(np.float64)) / 2
+    tie_goes_right = (below.view(np.uint32) & 1).astype(bool)
+
+    def goes_right(x):
+        v = (x - mean) / scale
+        return (v > midpoint) | (tie_goes_right & (v == midpoint))
+
+    # Start from the algebraic inverse, then walk float64 ulps to the exact boundary
+    x = midpoint * scale + mean
+    for _ in range(64):
+        lower = np.nextafter(x, -np.inf)
+        step_down = goes_right(lower)
+        step_up = ~goes_right(x)
+        if not (step_down.any() or step_up.any()):
+            break
+        x = np.where(step_down, lower, np.where(step_up, np.nextafter(x, np.inf), x))
+    return x
+
+def _tree_depth(tree):
+    """Depth (number of splits on the longest root-to-leaf path) of one JSON tree"""
+    left, right = tree['left_children'], tree['right_children']
+    depth, stack = 0, [(0, 0)]
+    while stack:
+        node, level = stack.pop()
+        if left[node] < 0:
+            depth = max(depth, level)
+        else:
+            stack += [(left[node], level + 1), (right[node], level + 1)]
+    return depth